@@ -32,8 +32,9 @@
 #
 
 import numpy as np
-from matplotlib import pyplot as plt
-# from graphics import * # graphics uses bad tkinter threading, breaks pyplot
+# matplotlib is imported in main(), and graphics in showGraphs(), so that the
+# fire functions can be imported (e.g. by worker processes) without loading
+# either.  graphics uses bad tkinter threading, breaks pyplot.
 from random import random
 
 EMPTY = 0
@@ -107,6 +108,8 @@ def main():
     print("Average burn percentage for each burnProbability :\n", \
             np.multiply(averages, 100))
 
+    from matplotlib import pyplot as plt
+
     #print ("After generation")
     #for dataset in datasets:
     #    for run in dataset:
@@ -232,6 +235,8 @@ def spread(site, N, E, S, W, burnProb = 0.1):
 # Function to display animation of a list of grids
 
 def showGraphs(graphList):
+    from graphics import GraphWin
+
     win = GraphWin("Fire", WIN_SIZE, WIN_SIZE)
     win.setBackground("white")
     for grid in graphList:        
@@ -244,6 +249,8 @@ def showGraphs(graphList):
 # burning tree (BURNING = 2) shows burnt orange.
 
 def drawMat(win, mat):
+    from graphics import Point, Rectangle
+
     n = len(mat) - 2
     width = WIN_SIZE/(n + 1)
     for j in range(1, n + 1):
@@ -259,5 +266,5 @@ def drawMat(win, mat):
             cell.draw(win)
 
 
-main()
-    
+if __name__ == "__main__":
+    main()
@@ -15,7 +15,8 @@
 # Next value based on site and nearest neighbors (N, E, S, W) 
 #
 
-from graphics import *
+# graphics is imported where it is drawn with, so the fire functions can be
+# imported without it
 from random import random
 
 EMPTY = 0
@@ -90,7 +91,7 @@ def extendLat(mat):
 
 def displayMat(mat):
     for row in mat:
-        print row
+        print(row)
 
 
 # Function to apply spread function
@@ -153,6 +154,8 @@ def spread(site, N, E, S, W):
 # Function to display animation of a list of grids
 
 def showGraphs(graphList):
+    from graphics import GraphWin
+
     win = GraphWin("Fire", WIN_SIZE, WIN_SIZE)
     win.setBackground("white")
     for grid in graphList:        
@@ -165,6 +168,8 @@ def showGraphs(graphList):
 # burning tree (BURNING = 2) shows burnt orange.
 
 def drawMat(win, mat):
+    from graphics import Point, Rectangle
+
     n = len(mat) - 2
     width = WIN_SIZE/(n + 1)
     for j in range(1, n + 1):
@@ -180,5 +185,5 @@ def drawMat(win, mat):
             cell.draw(win)
 
 
-main()
-    
+if __name__ == "__main__":
+    main()
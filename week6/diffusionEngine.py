@@ -0,0 +1,988 @@
+#!/usr/bin/env python3
+
+# diffusionEngine.py
+#
+# Author: Martin Metke
+# Date: 2026/10/19
+# For: CSS458A Week 6 Problem1 (performance)
+#
+# Array-level engine for the heat diffusion cellular automaton in
+# problem1.py.  Instead of visiting every interior cell in a Python double
+# loop, the whole lattice is updated at once: the eight Moore neighbours of
+# every interior site are taken as shifted slices (views, no copies) of the
+# extended lattice and handed to an array-aware diffusion function.
+#
+# Diffusion functions keep the signature used throughout problem1.py:
+#   diffFunc(diffusionRate, site, N, NE, E, SE, S, SW, W, NW)
+# where every argument after the rate is now an m x n array.
+#
+# The same machinery works on N-D lattices (e.g. 3-D blocks and plates)
+# with other stencils: 'moore' (all 3**d - 1 surrounding cells: 8 in 2-D,
+# 26 in 3-D) or 'vonNeumann' (the 2*d face neighbours: 4 in 2-D, 6 in 3-D).
+# The array-aware functions below then get one argument per neighbour.
+
+#============================= IMPORTS =======================================
+import itertools
+
+import numpy as np
+#============================= END IMPORTS ===================================
+
+
+# Scalar diffusion function -> equivalent array-aware function.  Functions
+# that are not pure arithmetic (e.g. ones drawing random numbers per call)
+# must be registered here to be vectorized.
+_arrayFuncs = {}
+
+# Cache of liftDiffFunc results so that each function is probed only once
+_liftCache = {}
+
+# Generator arrayDiffusionSto draws from
+_stoRng = np.random.default_rng()
+
+# Floating point precisions the heat lattice can be run in.  float64 is the
+# reference; float32 halves memory and bandwidth.
+PRECISIONS = (np.dtype('f'), np.dtype('d'))
+
+
+def checkPrecision(dtype):
+    """Return dtype as a numpy dtype, checking that it is one of PRECISIONS.
+
+    Args:
+        dtype (dtype):          e.g. 'f', 'd', np.float32, 'float64'
+
+    Returns:
+        dtype (np.dtype)
+
+    Raises:
+        ValueError:             dtype is not float32 or float64
+
+    """
+
+    dtype = np.dtype(dtype)
+
+    if dtype not in PRECISIONS:
+        raise ValueError("precision must be float32 or float64, not %s" %
+            (dtype,))
+
+    return dtype
+
+
+def arrayDiffusion(diffusionRate, site, *neighbours):
+    """Array-aware default diffusion function, for any number of neighbours
+    (N, NE, E, SE, S, SW, W, NW in 2-D)"""
+
+    return (1-len(neighbours)*diffusionRate)*site + \
+        diffusionRate*sum(neighbours)
+
+
+def arrayDiffusionSto(diffusionRate, site, *neighbours):
+    """Array-aware stochastic diffusion.  Each site gets its own
+    neighbour coefficients (1 + rndi)*r, with rndi drawn from a normal
+    distribution centered at 0.0 with STDDEV 0.5; the site itself keeps
+    1 - sum(coefficients) so every site's coefficients sum to 1.0.
+    All coefficients for the lattice are drawn in one call from a module
+    Generator, in the lattice's precision (float32 or float64).  Use a
+    StochasticDiffusion for seeded runs or to reuse the coefficient buffer."""
+
+    dtype = np.float32 if np.result_type(site) == np.float32 else np.float64
+    coeffs = _stoRng.standard_normal((len(neighbours),) + np.shape(site),
+        dtype=dtype)
+    coeffs *= 0.5
+    coeffs += 1
+    coeffs *= diffusionRate
+
+    newSite = (1 - np.sum(coeffs, axis=0)) * site
+
+    for coeff, neighbour in zip(coeffs, neighbours):
+        newSite += coeff * neighbour
+
+    return newSite
+
+
+# Mark both as array-aware so liftDiffFunc does not need to probe them
+arrayDiffusion.arrayAware = True
+arrayDiffusionSto.arrayAware = True
+
+
+class StochasticDiffusion:
+    '''Seedable, lattice-wide stochastic diffusion function.
+
+    Behaves like arrayDiffusionSto (same signature, same per-site
+    normalization so each site's coefficients sum to 1.0) but draws from
+    its own numpy Generator, so runs are reproducible from a seed.  The (8, m, n) block of
+    coefficients is generated in place into a buffer that is allocated on
+    the first step and reused for every step after that.  Deviates are drawn
+    directly in the lattice's precision (float32 or float64).
+    '''
+
+    arrayAware = True
+
+    def __init__(self, seed=None, stddev=0.5):
+        '''Constructor/initializer for StochasticDiffusion.
+
+        Args:
+            seed (int or SeedSequence):  Seed for the Generator (None for
+                                         fresh OS entropy)
+            stddev (float):              STDDEV of the normal deviates
+
+        '''
+        self.rng = np.random.default_rng(seed)
+        self.stddev = stddev
+        self.coeffs = None
+        self.total = None
+
+
+    def draw(self, shape, dtype='d', count=8):
+        '''Fill the coefficient buffer with fresh N(0, stddev) deviates for
+        a lattice of the given shape and return it.
+
+        Args:
+            shape (tuple):      Shape of the lattice (m, n)
+            dtype (dtype):      float32 or float64
+            count (int):        Number of neighbours per site
+
+        Returns:
+            coeffs (ndarray):   (count, m, n) buffer of deviates
+        '''
+
+        shape = (count,) + tuple(shape)
+        dtype = checkPrecision(dtype)
+
+        if self.coeffs is None or self.coeffs.shape != shape or \
+                self.coeffs.dtype != dtype:
+            self.coeffs = np.empty(shape, dtype=dtype)
+            self.total = np.empty(shape[1:], dtype=dtype)
+
+        self.rng.standard_normal(dtype=dtype, out=self.coeffs)
+        self.coeffs *= self.stddev
+
+        return self.coeffs
+
+
+    def __call__(self, diffusionRate, site, *neighbours):
+        '''Apply one step of stochastic diffusion to every site at once
+        (neighbours N, NE, E, SE, S, SW, W, NW in 2-D).
+
+        Returns:
+            newSite (ndarray):  Lattice after one step
+        '''
+
+        dtype = 'f' if np.result_type(site) == np.float32 else 'd'
+        newSite = np.empty(np.shape(site), dtype=dtype)
+        self.stepInto(diffusionRate, (site,) + neighbours, newSite)
+
+        return newSite
+
+
+    def stepInto(self, diffusionRate, patches, out):
+        '''Allocation-free form of __call__ used by DiffusionStepper.
+
+        Args:
+            diffusionRate (float):  Rate of diffusion
+            patches (tuple):        site and neighbour arrays
+            out (ndarray):          Array the new lattice is written into
+        '''
+
+        site = patches[0]
+        coeffs = self.draw(np.shape(site), out.dtype, len(patches) - 1)
+
+        # Coefficients of form "(1 + rndi)*r"
+        coeffs += 1.0
+        coeffs *= diffusionRate
+
+        np.sum(coeffs, axis=0, out=self.total)
+        np.subtract(1, self.total, out=self.total)
+        np.multiply(self.total, site, out=out)
+
+        # Coefficient slots are not needed after use; reuse them for the
+        # weighted neighbour terms.  (Indexing with '...' keeps 0-d slots
+        # as arrays, so single sites work as well as whole lattices.)
+        for k, neighbour in enumerate(patches[1:]):
+            coeff = coeffs[k, ...]
+            np.multiply(coeff, neighbour, out=coeff)
+            np.add(out, coeff, out=out)
+
+
+def registerArrayFunc(diffFunc, arrayFunc):
+    """Register arrayFunc as the array-aware equivalent of the scalar
+    diffusion function diffFunc.
+
+    Args:
+        diffFunc (function):    Scalar diffusion function
+        arrayFunc (function):   Function with the same signature that
+                                accepts m x n arrays for every site argument
+
+    """
+
+    _arrayFuncs[diffFunc] = arrayFunc
+    _liftCache.pop(diffFunc, None)
+
+
+# The 2-D Moore neighbourhood in diffFunc argument order:
+# N, NE, E, SE, S, SW, W, NW as (row, column) offsets
+MOORE_2D = ((-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1),
+    (-1, -1))
+
+STENCILS = ('moore', 'vonNeumann')
+
+
+def stencilOffsets(ndim=2, stencil='moore'):
+    """Neighbour offsets of a stencil on an ndim-dimensional lattice.
+
+    Args:
+        ndim (int):             Number of lattice dimensions
+        stencil (str):          'moore' (3**ndim - 1 neighbours, in MOORE_2D
+                                order for 2-D) or 'vonNeumann' (2*ndim)
+
+    Returns:
+        offsets (tuple):        Tuple of ndim-tuples of -1/0/1
+
+    Raises:
+        ValueError:             Unknown stencil
+
+    """
+
+    if stencil == 'moore':
+        if ndim == 2:
+            return MOORE_2D
+        return tuple(offset for offset in
+            itertools.product((-1, 0, 1), repeat=ndim) if any(offset))
+
+    if stencil == 'vonNeumann':
+        offsets = []
+        for axis in range(ndim):
+            for step in (-1, 1):
+                offset = [0] * ndim
+                offset[axis] = step
+                offsets.append(tuple(offset))
+        return tuple(offsets)
+
+    raise ValueError("stencil must be one of %s, not %r" % (STENCILS,
+        stencil))
+
+
+def stencilPatches(latExt, offsets):
+    """Return the interior of an extended lattice and its neighbours at
+    'offsets' as shifted views of latExt.  The last len(offsets[0]) axes
+    are the lattice; leading axes (e.g. a stack of ensemble replicates)
+    are carried along.
+
+    Args:
+        latExt (matrix):        Lattice extended by one cell on each side
+        offsets (tuple):        Neighbour offsets (see stencilOffsets)
+
+    Returns:
+        site, neighbours... (views): interior-shaped views of latExt
+
+    """
+
+    ndim = len(offsets[0])
+    patches = [latExt[(Ellipsis,) + (slice(1, -1),) * ndim]]
+
+    for offset in offsets:
+        index = tuple(slice(1 + o, o - 1 if o < 1 else None) for o in offset)
+        patches.append(latExt[(Ellipsis,) + index])
+
+    return tuple(patches)
+
+
+def stencilSum(latExt, offsets, out=None):
+    """Sum of the neighbours at 'offsets' of every interior site of latExt,
+    added in the order of offsets.
+
+    Args:
+        latExt (matrix):        Lattice extended by one cell on each side
+        offsets (tuple):        Neighbour offsets (see stencilOffsets)
+        out (matrix):           Optional interior-shaped output array
+
+    Returns:
+        total (matrix):         Interior-shaped matrix of neighbour sums
+
+    """
+
+    patches = stencilPatches(latExt, offsets)[1:]
+
+    if len(patches) == 1:
+        if out is None:
+            return np.array(patches[0])
+        np.copyto(out, patches[0])
+        return out
+
+    if out is None:
+        out = np.add(patches[0], patches[1])
+    else:
+        np.add(patches[0], patches[1], out=out)
+
+    for patch in patches[2:]:
+        np.add(out, patch, out=out)
+
+    return out
+
+
+def moorePatches(latExt):
+    """Return the interior of an extended 2-D lattice and its eight Moore
+    neighbours as shifted views of latExt.  Leading axes (e.g. a stack of
+    ensemble replicates) are carried along.
+
+    Args:
+        latExt (matrix):        Lattice extended by one cell on each side
+
+    Returns:
+        site, N, NE, E, SE, S, SW, W, NW (views): m x n views of latExt
+
+    """
+
+    return stencilPatches(latExt, MOORE_2D)
+
+
+def mooreSum(latExt, out=None):
+    """Sum of the eight Moore neighbours of every interior site of a 2-D
+    extended lattice latExt.
+
+    Args:
+        latExt (matrix):        Lattice extended by one cell on each side
+        out (matrix):           Optional m x n array to write the sum into
+
+    Returns:
+        total (matrix):         m x n matrix of neighbour sums
+
+    """
+
+    return stencilSum(latExt, MOORE_2D, out)
+
+
+def refreshGhosts(buf, boundary, ndim=2):
+    """Rewrite the one-cell ghost layer of a padded lattice in place.  Axes
+    are refreshed one after another over their full padded extent, so edge
+    and corner ghosts come out right in any number of dimensions.
+
+    Args:
+        buf (matrix):           Padded lattice; the last ndim axes are the
+                                lattice, e.g. (..., m+2, n+2)
+        boundary (str):         'reflecting' (ghosts copy the nearest edge
+                                cell, as reflectingLat), 'periodic' (ghosts
+                                copy the opposite edge) or 'fixed' (ghosts
+                                are left untouched)
+        ndim (int):             Number of lattice dimensions
+
+    """
+
+    if boundary == 'fixed':
+        return
+
+    # Ghost index <- source index, per boundary
+    if boundary == 'reflecting':
+        pairs = ((0, 1), (-1, -2))
+    else:
+        pairs = ((0, -2), (-1, 1))
+
+    for axis in range(buf.ndim - ndim, buf.ndim):
+        before = (slice(None),) * axis
+        for ghost, source in pairs:
+            buf[before + (ghost,)] = buf[before + (source,)]
+
+
+def _probeLift(diffFunc):
+    """Check whether diffFunc, written for scalars, gives the same answers
+    when handed whole arrays.  Pure arithmetic functions do; anything that
+    branches on values, builds arrays from its arguments or draws random
+    numbers either raises, returns the wrong shape, or disagrees with its
+    own per-cell results."""
+
+    rng = np.random.RandomState(458)
+    args = rng.uniform(0.0, 50.0, (9, 3, 4))
+    rate = 0.1
+
+    try:
+        lifted = np.asarray(diffFunc(rate, *args), dtype='d')
+        again = np.asarray(diffFunc(rate, *args), dtype='d')
+    except Exception:
+        return False
+
+    if lifted.shape != args.shape[1:] or not np.array_equal(lifted, again):
+        return False
+
+    for i in range(args.shape[1]):
+        for j in range(args.shape[2]):
+            try:
+                scalar = float(diffFunc(rate, *args[:, i, j]))
+            except Exception:
+                return False
+            if not np.isclose(scalar, lifted[i, j]):
+                return False
+
+    return True
+
+
+def liftDiffFunc(diffFunc):
+    """Return an array-aware version of diffFunc, or None if it cannot be
+    vectorized.
+
+    Registered functions map to their registered equivalent; functions
+    with a true 'arrayAware' attribute are used as-is; anything else is
+    probed once (see _probeLift) and used directly if it is pure
+    arithmetic.
+
+    Args:
+        diffFunc (function):    Diffusion function
+
+    Returns:
+        arrayFunc (function):   Array-aware function, or None
+
+    """
+
+    if diffFunc in _arrayFuncs:
+        return _arrayFuncs[diffFunc]
+
+    if getattr(diffFunc, 'arrayAware', False):
+        return diffFunc
+
+    if diffFunc not in _liftCache:
+        _liftCache[diffFunc] = diffFunc if _probeLift(diffFunc) else None
+
+    return _liftCache[diffFunc]
+
+
+def applyDiffusionArray(latExt, diffusionRate, diffFunc):
+    """Array-level counterpart of applyDiffusionExtended: takes an extended
+    lattice and returns the internal lattice with diffFunc applied to every
+    site at once.
+
+    Args:
+        latExt (matrix):        Lattice extended with reflecting boundaries
+        diffusionRate (float):  Rate of diffusion to apply to the Moore
+                                neighborhood
+        diffFunc (function):    Diffusion function; vectorized through
+                                liftDiffFunc
+
+    Returns:
+        lat (matrix):           Internal lattice, same dtype as latExt
+
+    Raises:
+        ValueError:             If diffFunc cannot be vectorized
+
+    """
+
+    arrayFunc = liftDiffFunc(diffFunc)
+
+    if arrayFunc is None:
+        raise ValueError("%s cannot be applied to whole arrays" %
+            getattr(diffFunc, '__name__', diffFunc))
+
+    newLat = arrayFunc(diffusionRate, *moorePatches(latExt))
+
+    # Match applyDiffusionExtended, which writes into a copy of latExt
+    return np.asarray(newLat).astype(latExt.dtype, copy=False)
+
+
+class DirichletSites:
+    '''Fixed-temperature (Dirichlet) sites compiled for fast re-imposition.
+
+    Sites are added as coordinate lists or boolean masks, each with a
+    single temperature or one temperature per site.  Sites added later
+    override earlier ones at the same cell (as coldSites override hotSites
+    in applyHotCold).  The sites are compiled once into one index array
+    per lattice axis, so re-imposing them on a lattice is one fancy-indexed
+    assignment in place however many sites there are; e.g. a heat-sink
+    pattern thresholded from an image can pin thousands of cells.  Lattices
+    of any number of dimensions are supported.
+    '''
+
+    def __init__(self, shape):
+        '''Constructor/initializer for DirichletSites.
+
+        Args:
+            shape (tuple):      Shape of the lattice the sites pin, e.g.
+                                (m, n) or (l, m, n)
+        '''
+
+        self.shape = tuple(shape)
+
+        # Dense staging arrays; compiled to index form on first use
+        self.mask = np.zeros(self.shape, dtype=bool)
+        self.temps = np.zeros(self.shape, dtype='d')
+        self.index = self.fixed = None
+
+
+    def add(self, coords, temp):
+        '''Pin the cells at coords.
+
+        Args:
+            coords (list):      List of [row, col] (or [layer, row, col],
+                                ...) coordinates; float coordinates are
+                                truncated as by int()
+            temp (float/list):  Temperature for all of coords, or one
+                                temperature per coordinate
+
+        Returns:
+            self (DirichletSites)
+        '''
+
+        coords = np.asarray(coords, dtype='d').reshape(-1, len(self.shape))
+        index = tuple(coords.astype(int).T)
+
+        self.mask[index] = True
+        self.temps[index] = temp
+        self.index = None
+
+        return self
+
+
+    def addMask(self, mask, temp):
+        '''Pin every cell where mask is True.
+
+        Args:
+            mask (ndarray):     Boolean array of the lattice's shape
+            temp (float/array): Temperature for all masked cells, or an
+                                array of the lattice's shape to take the
+                                masked cells' temperatures from
+
+        Returns:
+            self (DirichletSites)
+        '''
+
+        mask = np.asarray(mask, dtype=bool)
+
+        self.mask |= mask
+        if np.ndim(temp) == 0:
+            self.temps[mask] = temp
+        else:
+            self.temps[mask] = np.asarray(temp)[mask]
+        self.index = None
+
+        return self
+
+
+    def compile(self):
+        '''Build the per-axis index arrays and per-site temperatures'''
+
+        self.index = np.nonzero(self.mask)
+        self.fixed = self.temps[self.index]
+
+
+    @property
+    def rows(self):
+        '''Row (first axis) index of every site, compiled'''
+
+        if self.index is None:
+            self.compile()
+
+        return self.index[0]
+
+
+    @property
+    def cols(self):
+        '''Column (second axis) index of every site, compiled'''
+
+        if self.index is None:
+            self.compile()
+
+        return self.index[1]
+
+
+    def apply(self, lat):
+        '''Re-impose the fixed temperatures on lat, in place.
+
+        Args:
+            lat (matrix):       Lattice (or view of one) of this shape, or
+                                a stack of them along leading axes
+
+        Returns:
+            lat (matrix):       The same lattice
+        '''
+
+        if self.index is None:
+            self.compile()
+
+        lat[(Ellipsis,) + self.index] = self.fixed
+
+        return lat
+
+
+    # Lets a DirichletSites be passed as DiffusionStepper's pins
+    __call__ = apply
+
+
+    def __len__(self):
+        '''Number of pinned cells'''
+
+        if self.index is None:
+            self.compile()
+
+        return len(self.fixed)
+
+
+class DiffusionStepper:
+    '''Double-buffered, in-place diffusion stepper.
+
+    Owns two lattices padded with a one-cell ghost layer.  Each step
+    refreshes the ghost layer of the current buffer for the chosen boundary
+    condition and writes the next state into the interior of the other
+    buffer with out= arithmetic, then swaps.  With arrayDiffusion or a
+    diffusion function that has a stepInto method (StochasticDiffusion), no
+    lattice sized arrays are allocated after construction, whatever the
+    number of steps; any other array-aware function returns a new lattice
+    every step, which is copied in.
+
+    The lattice may carry leading axes, e.g. an (R, m, n) stack of ensemble
+    replicates; every replicate is advanced by the same stencil step (with
+    its own noise, for stochastic diffusion functions).  The lattice itself
+    may have any number of dimensions (ndim), with a Moore or von Neumann
+    stencil (see stencilOffsets).
+
+    Boundary conditions:
+        'reflecting':   ghost cells copy the nearest edge cell (reflectingLat)
+        'periodic':     ghost cells copy the opposite edge (wrap-around)
+        'fixed':        ghost cells hold fixedValue for the whole run
+    '''
+
+    BOUNDARIES = ('reflecting', 'periodic', 'fixed')
+
+    def __init__(self, lat, diffusionRate, diffFunc=arrayDiffusion,
+            boundary='reflecting', fixedValue=0.0, pins=None, ndim=2,
+            stencil='moore'):
+        '''Constructor/initializer for DiffusionStepper.
+
+        Args:
+            lat (matrix):           Initial m x n lattice, or (..., m, n)
+                                    stack of lattices (copied; the
+                                    stepper keeps lat's dtype)
+            diffusionRate (float):  Rate of diffusion
+            diffFunc (function):    Diffusion function; vectorized through
+                                    liftDiffFunc
+            boundary (str):         One of BOUNDARIES
+            fixedValue (float):     Ghost value for the 'fixed' boundary
+            pins (function):        Optional function called with the new
+                                    interior after every step to re-impose
+                                    fixed sites in place (e.g. hot/cold)
+            ndim (int):             Number of lattice dimensions (the last
+                                    ndim axes of lat)
+            stencil (str):          'moore' or 'vonNeumann'
+
+        Raises:
+            ValueError:             Unknown boundary or stencil, or
+                                    diffFunc cannot be vectorized
+        '''
+
+        if boundary not in self.BOUNDARIES:
+            raise ValueError("boundary must be one of %s, not %r" %
+                (self.BOUNDARIES, boundary))
+
+        self.arrayFunc = liftDiffFunc(diffFunc)
+        if self.arrayFunc is None:
+            raise ValueError("%s cannot be applied to whole arrays" %
+                getattr(diffFunc, '__name__', diffFunc))
+
+        lat = np.asarray(lat)
+        shape = lat.shape
+        padded = shape[:-ndim] + tuple(size + 2 for size in shape[-ndim:])
+
+        self.ndim = ndim
+        self.offsets = stencilOffsets(ndim, stencil)
+
+        self.diffusionRate = diffusionRate
+        self.boundary = boundary
+        self.fixedValue = fixedValue
+        self.pins = pins
+        self.steps = 0
+
+        self.buffers = [np.empty(padded, dtype=lat.dtype)
+                for i in range(2)]
+        for buf in self.buffers:
+            buf.fill(fixedValue)
+
+        # Views into each buffer are built once and reused every step
+        self.patches = [stencilPatches(buf, self.offsets)
+            for buf in self.buffers]
+        self.interiors = [patches[0] for patches in self.patches]
+
+        # Integer lattices cannot be written with float out= arithmetic, so
+        # the step is computed in a float work array and cast on copy.
+        if np.issubdtype(lat.dtype, np.floating):
+            self.work = None
+        else:
+            self.work = np.empty(shape, dtype='d')
+
+        # Scratch for the (1-kr)*site term of the default stencil
+        self.scratch = np.empty(shape, dtype=self.work.dtype
+            if self.work is not None else lat.dtype)
+
+        self.current = 0
+        self.interiors[0][...] = lat
+
+
+    @property
+    def lattice(self):
+        '''Interior (m x n view) of the current state'''
+
+        return self.interiors[self.current]
+
+
+    @property
+    def extended(self):
+        '''Current state including its ghost layer'''
+
+        return self.buffers[self.current]
+
+
+    def refreshGhosts(self, buf=None):
+        '''Rewrite the ghost layer of buf (default: the current buffer) in
+        place for this stepper's boundary condition.'''
+
+        if buf is None:
+            buf = self.buffers[self.current]
+
+        refreshGhosts(buf, self.boundary, self.ndim)
+
+
+    def step(self, steps=1):
+        '''Advance the lattice 'steps' steps.
+
+        Returns:
+            lattice (matrix):   View of the new current state.  It is
+                                overwritten two steps later; copy it to
+                                keep it.
+        '''
+
+        rate = self.diffusionRate
+
+        for i in range(steps):
+            src = self.current
+            dst = 1 - src
+
+            self.refreshGhosts(self.buffers[src])
+
+            patches = self.patches[src]
+            target = self.interiors[dst] if self.work is None else self.work
+
+            if self.arrayFunc is arrayDiffusion:
+                # (1-kr)*site + r*(N + NE + ... + NW), as in arrayDiffusion
+                stencilSum(self.buffers[src], self.offsets, out=target)
+                np.multiply(target, rate, out=target)
+                np.multiply(patches[0], 1 - len(self.offsets)*rate,
+                    out=self.scratch)
+                np.add(self.scratch, target, out=target)
+
+            elif hasattr(self.arrayFunc, 'stepInto'):
+                self.arrayFunc.stepInto(rate, patches, target)
+
+            else:
+                np.copyto(target, self.arrayFunc(rate, *patches),
+                    casting='unsafe')
+
+            if target is not self.interiors[dst]:
+                np.copyto(self.interiors[dst], target, casting='unsafe')
+
+            if self.pins is not None:
+                self.pins(self.interiors[dst])
+
+            self.current = dst
+            self.steps += 1
+
+        return self.lattice
+
+
+class FrameRecorder:
+    '''Records the lattice every 'every' steps into one preallocated
+    (T//every + 1, m, n) array, instead of growing a history with np.append
+    (which copies the whole history every step).
+
+    Steps 0, every, 2*every, ... up to T are kept.  Subclasses change where
+    frames are stored (MemmapRecorder) or what part of each lattice is kept
+    (ProbeRecorder).
+    '''
+
+    def __init__(self, every=1, dtype=None):
+        '''Constructor/initializer for FrameRecorder.
+
+        Args:
+            every (int):        Record every k-th step (1 records all)
+            dtype (dtype):      dtype of the history (default: lattice's)
+        '''
+
+        if every < 1:
+            raise ValueError("every must be a positive integer, not %r" %
+                (every,))
+
+        self.every = every
+        self.dtype = dtype
+        self.frames = None
+
+
+    def frameShape(self, lat):
+        '''Shape of one recorded frame of lat'''
+
+        return np.shape(lat)
+
+
+    def allocate(self, shape, dtype):
+        '''Return the array the history is written into'''
+
+        return np.empty(shape, dtype=dtype)
+
+
+    def select(self, lat):
+        '''Part of lat that is recorded'''
+
+        return lat
+
+
+    def start(self, lat, steps):
+        '''Allocate the history for a run of 'steps' steps from lat.'''
+
+        dtype = self.dtype if self.dtype is not None else np.asarray(lat).dtype
+        count = steps // self.every + 1
+
+        self.frames = self.allocate((count,) + tuple(self.frameShape(lat)),
+            dtype)
+
+
+    def record(self, step, lat):
+        '''Record lat as the state after 'step' steps, if it is kept.'''
+
+        if step % self.every == 0:
+            self.frames[step // self.every] = self.select(lat)
+
+
+    def truncate(self, steps):
+        '''Drop the frames after step 'steps', for runs that stop early.
+        (A MemmapRecorder's file keeps its full size.)'''
+
+        self.frames = self.frames[:steps // self.every + 1]
+
+
+    def result(self):
+        '''Return the recorded history'''
+
+        return self.frames
+
+
+class MemmapRecorder(FrameRecorder):
+    '''FrameRecorder that streams frames into a .npy file through a memory
+    map, so histories larger than RAM can be kept.  The file can be reopened
+    later with np.load(path, mmap_mode='r').
+    '''
+
+    def __init__(self, path, every=1, dtype=None):
+        '''Constructor/initializer for MemmapRecorder.
+
+        Args:
+            path (str):         .npy file to create (overwritten)
+            every (int):        Record every k-th step
+            dtype (dtype):      dtype of the history (default: lattice's)
+        '''
+
+        FrameRecorder.__init__(self, every, dtype)
+        self.path = path
+
+
+    def allocate(self, shape, dtype):
+        return np.lib.format.open_memmap(self.path, mode='w+', dtype=dtype,
+            shape=shape)
+
+
+    def result(self):
+        self.frames.flush()
+        return self.frames
+
+
+def probeIndex(probes):
+    '''Turn a list of probe cells (or a single cell) into a tuple of
+    per-axis index arrays'''
+
+    probes = np.atleast_2d(np.asarray(probes, dtype=int))
+
+    return tuple(probes.T)
+
+
+class ProbeRecorder(FrameRecorder):
+    '''FrameRecorder that keeps only the temperatures of a list of probe
+    cells, giving a (T//every + 1, len(probes)) history.'''
+
+    def __init__(self, probes, every=1, dtype=None):
+        '''Constructor/initializer for ProbeRecorder.
+
+        Args:
+            probes (list):      List of [row, col] (or [layer, row, col],
+                                ...) cells to record
+            every (int):        Record every k-th step
+            dtype (dtype):      dtype of the history (default: lattice's)
+        '''
+
+        FrameRecorder.__init__(self, every, dtype)
+        self.index = probeIndex(probes)
+
+
+    def frameShape(self, lat):
+        return (len(self.index[0]),)
+
+
+    def select(self, lat):
+        return lat[self.index]
+
+
+class EnsembleProbeStats:
+    '''Streaming statistics of probe cells across ensemble replicates.
+
+    Used like a recorder, but on an (R, m, n) stack of replicates: at every
+    recorded step the probe temperatures of all R replicates are reduced to
+    their mean, variance and percentiles, and only those are kept.  Memory
+    is O(T * n_probes), independent of R.
+    '''
+
+    def __init__(self, probes, percentiles=(5, 50, 95), every=1):
+        '''Constructor/initializer for EnsembleProbeStats.
+
+        Args:
+            probes (list):          List of [row, col] (or [layer, row,
+                                    col], ...) cells to track
+            percentiles (list):     Percentiles (0-100) to report per step
+            every (int):            Record every k-th step
+        '''
+
+        self.index = probeIndex(probes)
+        self.percentiles = np.asarray(percentiles, dtype='d')
+        self.every = every
+
+
+    def start(self, lat, steps):
+        '''Allocate the per-step statistics for a run of 'steps' steps.'''
+
+        count = steps // self.every + 1
+        numProbes = len(self.index[0])
+
+        self.mean = np.empty((count, numProbes), dtype='d')
+        self.var = np.empty((count, numProbes), dtype='d')
+        self.bands = np.empty((count, len(self.percentiles), numProbes),
+            dtype='d')
+
+
+    def record(self, step, lat):
+        '''Reduce the replicates in lat (R, m, n) after 'step' steps.'''
+
+        if step % self.every:
+            return
+
+        k = step // self.every
+        numProbes = len(self.index[0])
+        temps = lat[(Ellipsis,) + self.index].reshape(-1, numProbes)
+
+        self.mean[k] = np.mean(temps, axis=0)
+        self.var[k] = np.var(temps, axis=0)
+        self.bands[k] = np.percentile(temps, self.percentiles, axis=0)
+
+
+    def result(self):
+        '''Return the statistics.
+
+        Returns:
+            stats (dict):   "mean" and "var" of shape (T//every + 1, n_probes),
+                            "percentiles" of shape (T//every + 1,
+                            n_percentiles, n_probes), and the "levels" those
+                            percentiles were taken at
+        '''
+
+        return {"mean": self.mean,
+                "var": self.var,
+                "percentiles": self.bands,
+                "levels": self.percentiles}
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+
+# diffusionFrames.py
+#
+# Author: Martin Metke
+# Date: 2026/10/19
+# For: CSS458A Week 6 Problem1 (performance)
+#
+# Raster export of diffusion lattices for animations.
+#
+# Drawing every stored lattice with its own matshow artist and handing them
+# all to an ArtistAnimation keeps one artist (and one image copy) per frame
+# alive.  Here a lattice is instead turned into RGB directly in NumPy: it is
+# scaled to colormap levels and looked up in a colormap table computed
+# once.  The RGB frame lives in a buffer reused for every frame, and is
+# streamed straight out by a recorder:
+#   RawVideoRecorder:   appends rgb24 frames to one raw video file, e.g. for
+#                       ffmpeg -f rawvideo -pix_fmt rgb24 -s WxH -i file
+#   PNGRecorder:        writes one numbered PNG per frame
+#   ImageRecorder:      updates a single matplotlib AxesImage via set_data
+# The recorders have the diffusionEngine recorder interface, so they can be
+# passed to problem1.diffusionSim and memory stays constant however many
+# frames are written.
+
+#============================= IMPORTS =======================================
+import struct
+import zlib
+
+import numpy as np
+#============================= END IMPORTS ===================================
+
+
+def colormapLUT(cmap='jet', levels=256):
+    '''Sample a matplotlib colormap into an RGB lookup table.
+
+    Args:
+        cmap (str/Colormap):    Colormap or its name
+        levels (int):           Number of table entries
+
+    Returns:
+        lut (ndarray):          (levels, 3) uint8 table
+    '''
+
+    from matplotlib import colormaps
+
+    if isinstance(cmap, str):
+        cmap = colormaps[cmap]
+
+    rgba = cmap(np.linspace(0.0, 1.0, levels))
+
+    return np.round(rgba[:, :3] * 255).astype(np.uint8)
+
+
+class Rasterizer:
+    '''Maps lattices to RGB images through a colormap lookup table.
+
+    Values are scaled linearly from [vmin, vmax] to the table's levels
+    (values outside are clipped).  If vmin or vmax is not given it is taken
+    from the first lattice rasterized and then kept, so every frame of an
+    animation shares one color scale.  All work is done in buffers that
+    are allocated for the first frame and reused.
+    '''
+
+    def __init__(self, cmap='jet', vmin=None, vmax=None, levels=256,
+            zoom=1):
+        '''Constructor/initializer for Rasterizer.
+
+        Args:
+            cmap (str/Colormap/ndarray): Colormap, its name, or a ready
+                                        (levels, 3) uint8 lookup table
+            vmin, vmax (float):         Values mapped to the first and last
+                                        colors
+            levels (int):               Table entries, if built from cmap
+            zoom (int):                 Pixels per lattice cell along each
+                                        axis
+        '''
+
+        if isinstance(cmap, np.ndarray):
+            self.lut = np.asarray(cmap, dtype=np.uint8)
+        else:
+            self.lut = colormapLUT(cmap, levels)
+
+        if zoom < 1:
+            raise ValueError("zoom must be a positive integer, not %r" %
+                (zoom,))
+
+        self.vmin = vmin
+        self.vmax = vmax
+        self.zoom = zoom
+        self.shape = None
+
+
+    def frameShape(self, lat):
+        '''Shape (height, width, 3) of the image of lat'''
+
+        m, n = np.shape(lat)
+
+        return (m * self.zoom, n * self.zoom, 3)
+
+
+    def _prepare(self, lat):
+        '''Fix the color scale and allocate the buffers for lat's shape'''
+
+        if self.vmin is None:
+            self.vmin = float(np.min(lat))
+        if self.vmax is None:
+            self.vmax = float(np.max(lat))
+
+        self.shape = np.shape(lat)
+        self.scaled = np.empty(self.shape, dtype='d')
+        self.index = np.empty(self.shape, dtype=np.intp)
+        self.cells = np.empty(self.shape + (3,), dtype=np.uint8)
+        self.image = np.empty(self.frameShape(lat), dtype=np.uint8)
+
+
+    def toRGB(self, lat):
+        '''Rasterize lat.
+
+        Returns:
+            image (ndarray):    (height, width, 3) uint8 image; a buffer
+                                that the next call overwrites
+        '''
+
+        if self.shape != np.shape(lat):
+            self._prepare(lat)
+
+        top = len(self.lut) - 1
+        span = self.vmax - self.vmin
+        scale = top / span if span > 0 else 0.0
+
+        # index = clip(round((lat - vmin) * scale), 0, top)
+        np.subtract(lat, self.vmin, out=self.scaled)
+        np.multiply(self.scaled, scale, out=self.scaled)
+        np.rint(self.scaled, out=self.scaled)
+        np.clip(self.scaled, 0, top, out=self.scaled)
+        np.copyto(self.index, self.scaled, casting='unsafe')
+
+        np.take(self.lut, self.index, axis=0, out=self.cells)
+
+        if self.zoom == 1:
+            return self.cells
+
+        # Repeat every cell zoom x zoom times by broadcasting into the image
+        m, n = self.shape
+        blocks = self.image.reshape(m, self.zoom, n, self.zoom, 3)
+        blocks[...] = self.cells[:, None, :, None, :]
+
+        return self.image
+
+
+def encodePNG(image):
+    '''Encode an RGB image as a PNG file (8-bit truecolor, no filtering).
+
+    Args:
+        image (ndarray):        (height, width, 3) uint8 image
+
+    Returns:
+        data (bytes):           Contents of the PNG file
+    '''
+
+    height, width = image.shape[:2]
+
+    # Every scanline starts with its filter type byte (0: none)
+    raw = np.zeros((height, 1 + 3 * width), dtype=np.uint8)
+    raw[:, 1:] = image.reshape(height, 3 * width)
+
+    def chunk(kind, body):
+        return (struct.pack(">I", len(body)) + kind + body +
+            struct.pack(">I", zlib.crc32(kind + body) & 0xffffffff))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) +
+        chunk(b"IDAT", zlib.compress(raw.tobytes(), 6)) +
+        chunk(b"IEND", b""))
+
+
+class RasterRecorder:
+    '''Base for recorders that rasterize every 'every'-th lattice and pass
+    the image on (see write) instead of keeping it.  Has the recorder
+    interface of diffusionEngine.FrameRecorder; result() returns the number
+    of frames written.
+    '''
+
+    def __init__(self, rasterizer=None, every=1):
+        '''Constructor/initializer for RasterRecorder.
+
+        Args:
+            rasterizer (Rasterizer):    Lattice to RGB mapping (default:
+                                        Rasterizer() with the jet colormap)
+            every (int):                Record every k-th step
+        '''
+
+        if every < 1:
+            raise ValueError("every must be a positive integer, not %r" %
+                (every,))
+
+        self.rasterizer = rasterizer if rasterizer is not None else \
+            Rasterizer()
+        self.every = every
+        self.count = 0
+
+
+    def start(self, lat, steps):
+        '''Prepare for a run of 'steps' steps from lat.'''
+
+        self.count = 0
+
+
+    def record(self, step, lat):
+        '''Rasterize and write lat as the state after 'step' steps, if it
+        is kept.'''
+
+        if step % self.every == 0:
+            self.write(self.count, self.rasterizer.toRGB(lat))
+            self.count += 1
+
+
+    def write(self, frame, image):
+        '''Output 'image' as frame number 'frame'; overridden by subclasses'''
+
+        raise NotImplementedError
+
+
+    def truncate(self, steps):
+        '''Frames already written are kept; nothing to drop.'''
+
+        pass
+
+
+    def result(self):
+        '''Return the number of frames written'''
+
+        return self.count
+
+
+class RawVideoRecorder(RasterRecorder):
+    '''RasterRecorder that appends rgb24 frames to one raw video file (or any
+    writable binary stream, such as the stdin of an ffmpeg process).'''
+
+    def __init__(self, path, rasterizer=None, every=1):
+        '''Constructor/initializer for RawVideoRecorder.
+
+        Args:
+            path (str/file):            File to create (overwritten), or an
+                                        open binary stream
+            rasterizer (Rasterizer):    Lattice to RGB mapping
+            every (int):                Record every k-th step
+        '''
+
+        RasterRecorder.__init__(self, rasterizer, every)
+        self.path = path
+        self.stream = None
+
+
+    def start(self, lat, steps):
+        RasterRecorder.start(self, lat, steps)
+
+        if hasattr(self.path, 'write'):
+            self.stream = self.path
+        else:
+            self.stream = open(self.path, 'wb')
+
+
+    def write(self, frame, image):
+        self.stream.write(image.data)
+
+
+    def result(self):
+        if self.stream is not self.path:
+            self.stream.close()
+        else:
+            self.stream.flush()
+
+        return self.count
+
+
+class PNGRecorder(RasterRecorder):
+    '''RasterRecorder that writes one PNG file per frame.'''
+
+    def __init__(self, pattern, rasterizer=None, every=1):
+        '''Constructor/initializer for PNGRecorder.
+
+        Args:
+            pattern (str):              File name with a format field for
+                                        the frame number, e.g.
+                                        'frames/bar%05i.png'
+            rasterizer (Rasterizer):    Lattice to RGB mapping
+            every (int):                Record every k-th step
+        '''
+
+        RasterRecorder.__init__(self, rasterizer, every)
+        self.pattern = pattern
+
+
+    def write(self, frame, image):
+        with open(self.pattern % frame, 'wb') as f:
+            f.write(encodePNG(image))
+
+
+class ImageRecorder(RasterRecorder):
+    '''RasterRecorder that shows every frame in one matplotlib AxesImage,
+    updated in place with set_data, e.g. for a live view of a long run.'''
+
+    def __init__(self, image, rasterizer=None, every=1, pause=0.01):
+        '''Constructor/initializer for ImageRecorder.
+
+        Args:
+            image (AxesImage):          Image to update (e.g. from imshow)
+            rasterizer (Rasterizer):    Lattice to RGB mapping
+            every (int):                Record every k-th step
+            pause (float):              Seconds to let the GUI draw each
+                                        frame; None does not redraw
+        '''
+
+        RasterRecorder.__init__(self, rasterizer, every)
+        self.image = image
+        self.pause = pause
+
+
+    def write(self, frame, image):
+        self.image.set_data(image)
+
+        if self.pause is not None:
+            from matplotlib import pyplot as plt
+
+            plt.pause(self.pause)
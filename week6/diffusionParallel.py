@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+
+# diffusionParallel.py
+#
+# Author: Martin Metke
+# Date: 2026/10/19
+# For: CSS458A Week 6 Problem1 (performance)
+#
+# Multi-process, domain-decomposed version of the diffusionEngine stencil,
+# for lattices too large for one process to sweep quickly.
+#
+# The two padded lattices of the double buffer live in
+# multiprocessing.shared_memory.  The interior rows (the first lattice axis;
+# layers of a 3-D lattice) are split into one contiguous block per worker
+# process.  Every step each worker
+#   1. refreshes the ghost cells bordering its own block,
+#   2. waits at a barrier, so every block's edge rows (its halo for the
+#      neighbouring blocks) and ghost cells are in place,
+#   3. computes the stencil for its block into the other buffer and
+#      re-imposes the hot/cold sites that fall inside its block,
+#   4. waits at a barrier, so no worker reads a halo row still being written.
+# The arithmetic is exactly that of DiffusionStepper, so the result is
+# identical to the serial engine's.
+
+#============================= IMPORTS =======================================
+import multiprocessing as mp
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import diffusionEngine
+#============================= END IMPORTS ===================================
+
+
+def rowBlocks(m, workers):
+    '''Split m rows into 'workers' contiguous blocks of near-equal size.
+
+    Returns:
+        blocks (list):      List of (start, stop) row ranges
+    '''
+
+    edges = np.linspace(0, m, workers + 1).round().astype(int)
+
+    return [(int(edges[i]), int(edges[i+1])) for i in range(workers)]
+
+
+def _refreshBlockGhosts(buf, r0, r1, boundary):
+    '''Refresh the ghost cells of padded buffer buf that border interior
+    rows [r0, r1): the ghost rows if the block touches the top/bottom edge,
+    then the ghosts along the remaining axes of the block's rows (and of
+    those ghost rows, so corners are covered).  Mirrors
+    diffusionEngine.refreshGhosts.'''
+
+    m = buf.shape[0] - 2
+
+    if boundary == 'fixed':
+        return
+
+    top = r0 == 0
+    bottom = r1 == m
+
+    if boundary == 'reflecting':
+        if top:
+            buf[0] = buf[1]
+        if bottom:
+            buf[-1] = buf[-2]
+    else:
+        if top:
+            buf[0] = buf[-2]
+        if bottom:
+            buf[-1] = buf[1]
+
+    rows = slice(r0 + 1 - top, r1 + 1 + bottom)
+    diffusionEngine.refreshGhosts(buf[rows], boundary, buf.ndim - 1)
+
+
+def _worker(names, shape, dtype, r0, r1, diffusionRate, steps, boundary,
+        offsets, pins, barrier):
+    '''Body of one worker process; advances interior rows [r0, r1).'''
+
+    blocks = [shared_memory.SharedMemory(name=name) for name in names]
+    buffers = extended = patches = None
+
+    try:
+        buffers = [np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+            for shm in blocks]
+
+        # Padded rows r0 .. r1+1 hold the block and its one-row halos
+        extended = [buf[r0:r1 + 2] for buf in buffers]
+        patches = [diffusionEngine.stencilPatches(ext, offsets)
+            for ext in extended]
+        scratch = np.empty(patches[0][0].shape, dtype=dtype)
+
+        pinIndex, pinTemps = pins
+        rate = diffusionRate
+        current = 0
+
+        for step in range(steps):
+            src = current
+            dst = 1 - src
+
+            _refreshBlockGhosts(buffers[src], r0, r1, boundary)
+            barrier.wait()
+
+            # Same operations, in the same order, as DiffusionStepper.step
+            target = patches[dst][0]
+            diffusionEngine.stencilSum(extended[src], offsets, out=target)
+            np.multiply(target, rate, out=target)
+            np.multiply(patches[src][0], 1 - len(offsets)*rate, out=scratch)
+            np.add(scratch, target, out=target)
+
+            target[pinIndex] = pinTemps
+
+            barrier.wait()
+            current = dst
+
+    except BaseException:
+        barrier.abort()
+        raise
+
+    finally:
+        buffers = extended = patches = target = None
+        for shm in blocks:
+            shm.close()
+
+
+def parallelDiffuse(lat, diffusionRate, steps, workers=None,
+        boundary='reflecting', fixedValue=0.0, sites=None, dtype='d',
+        stencil='moore'):
+    '''Advance a lattice 'steps' steps of the default diffusion function,
+    split over several processes.
+
+    Args:
+        lat (matrix):           Initial lattice, m x n (or l x m x n, ...)
+        diffusionRate (float):  Rate of diffusion
+        steps (int):            Number of steps
+        workers (int):          Worker processes (default: CPU count),
+                                at most one per row (first axis)
+        boundary (str):         'reflecting', 'periodic' or 'fixed'
+        fixedValue (float):     Ghost value for the 'fixed' boundary
+        sites (DirichletSites): Optional fixed-temperature sites
+        dtype (dtype):          Precision, float32 or float64
+        stencil (str):          'moore' or 'vonNeumann'
+
+    Returns:
+        lat (matrix):           Lattice after 'steps' steps, equal to what
+                                diffusionEngine.DiffusionStepper gives
+
+    Raises:
+        ValueError:             Unknown boundary or stencil
+        RuntimeError:           A worker process failed
+    '''
+
+    if boundary not in diffusionEngine.DiffusionStepper.BOUNDARIES:
+        raise ValueError("boundary must be one of %s, not %r" %
+            (diffusionEngine.DiffusionStepper.BOUNDARIES, boundary))
+
+    dtype = diffusionEngine.checkPrecision(dtype)
+    lat = np.asarray(lat, dtype=dtype)
+    offsets = diffusionEngine.stencilOffsets(lat.ndim, stencil)
+    m = lat.shape[0]
+    shape = tuple(size + 2 for size in lat.shape)
+    interior = (slice(1, -1),) * lat.ndim
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, m))
+
+    if sites is not None:
+        sites.compile()
+        pinIndex, pinTemps = sites.index, sites.fixed
+    else:
+        pinIndex = (np.zeros(0, dtype=int),) * lat.ndim
+        pinTemps = np.zeros(0, dtype=dtype)
+
+    nbytes = int(np.prod(shape)) * dtype.itemsize
+    blocks = [shared_memory.SharedMemory(create=True, size=nbytes)
+        for i in range(2)]
+    buffers = None
+
+    try:
+        buffers = [np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+            for shm in blocks]
+        for buf in buffers:
+            buf.fill(fixedValue)
+        buffers[0][interior] = lat
+
+        barrier = mp.Barrier(workers)
+        procs = []
+
+        for r0, r1 in rowBlocks(m, workers):
+            # Route each site to the block that owns its row, in block
+            # coordinates
+            mine = (pinIndex[0] >= r0) & (pinIndex[0] < r1)
+            pins = ((pinIndex[0][mine] - r0,) +
+                tuple(axis[mine] for axis in pinIndex[1:]), pinTemps[mine])
+
+            names = [shm.name for shm in blocks]
+            proc = mp.Process(target=_worker, args=(names, shape, dtype, r0,
+                r1, diffusionRate, steps, boundary, offsets, pins, barrier))
+            proc.start()
+            procs.append(proc)
+
+        for proc in procs:
+            proc.join()
+
+        if any(proc.exitcode != 0 for proc in procs):
+            raise RuntimeError("diffusion worker failed (exit codes %s)" %
+                [proc.exitcode for proc in procs])
+
+        result = np.array(buffers[steps % 2][interior])
+
+    finally:
+        # Views must be released before the shared memory can be closed
+        buffers = None
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+
+    return result
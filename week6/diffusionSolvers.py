@@ -0,0 +1,630 @@
+#!/usr/bin/env python3
+
+# diffusionSolvers.py
+#
+# Author: Martin Metke
+# Date: 2026/10/19
+# For: CSS458A Week 6 Problem1 (performance)
+#
+# Solvers for the heat diffusion model in problem1.py that go beyond
+# stepping the explicit cellular automaton one step at a time.
+#
+# Implicit (ADI) stepping
+# -----------------------
+# The explicit update (1-8r)*site + r*(sum of Moore neighbours) is
+#   u' = u + r*L8(u),    L8 = Moore sum - 8
+# and becomes unstable for large r.  The 3 x 3 box sum is separable,
+# (3 + dx2)(3 + dy2), where dx2/dy2 are the 1-D second differences along a
+# row/column, so
+#   L8 = 3*dx2 + 3*dy2 + dx2*dy2.
+# ADIStepper advances u' = u + R*L8(u) (R = r*dt, dt explicit steps at once)
+# with the Douglas ADI scheme (theta = 1/2):
+#   Y0 = u + R*L8(u)
+#   (I - 1.5R dx2) Y1 = Y0 - 1.5R dx2(u)      one tridiagonal solve per row
+#   (I - 1.5R dy2) Y2 = Y1 - 1.5R dy2(u)      one per column;  u' = Y2
+# Reflecting boundaries enter the tridiagonal systems as Neumann end rows;
+# hot/cold sites enter as identity rows holding their fixed temperatures.
+# The scheme is stable, but it is only accurate for R up to about 1: modes
+# too stiff for the step are multiplied by nearly -1 every step instead of
+# decaying, and the split factors do not commute with the pinned sites.  On
+# the 100 x 280 bar at r = 0.1, R = 5 overshoots to -12 and 51 and R = 10 is
+# 15 degrees off the explicit model after 100 explicit steps, so ADIStepper
+# refuses R above MAX_RATE (1, i.e. 10 explicit steps at r = 0.1).
+#
+# Implicit (backward Euler) stepping
+# ----------------------------------
+# For larger steps ImplicitStepper solves the unsplit backward Euler step
+#   (I - R*L8) u' = u
+# on the free cells with the multigrid-preconditioned conjugate gradients of
+# steadyState.  I - R*L8 is an M-matrix (positive diagonal 1 + 8R,
+# non-positive neighbour weights -R, diagonally dominant), so every step
+# keeps u' within the range of u and the fixed temperatures: no overshoot
+# for any R, and stiff modes are damped rather than flipped.  The scheme is
+# first order in time; on the same bar it is 2 degrees off the explicit
+# model after one step of 100 explicit steps, and within 0.2 degrees
+# from 1000 explicit steps on.
+#
+# Spectral (FFT) solution
+# -----------------------
+# With periodic boundaries the explicit step is a circular convolution, so
+# in Fourier space each mode is just multiplied by
+#   g(k) = 1 - 8r + r*((1 + 2cos kx)(1 + 2cos ky) - 1)
+# every step.  spectralAdvance jumps n steps at once with g**n, and
+# spectralEvolve gives the continuous-time solution exp(t*(g - 1))
+# (t in units of explicit steps), both O(N log N) whatever n or t.
+
+#============================= IMPORTS =======================================
+import numpy as np
+
+import diffusionEngine
+#============================= END IMPORTS ===================================
+
+
+def tridiagonalFactors(lower, diag, upper):
+    """Forward-elimination factors of the Thomas algorithm for a stack of
+    tridiagonal systems along axis 0 (one system per column of the
+    arrays).  Factoring once lets every later solve with the same matrix
+    skip the divisions in the coefficients.
+
+    Args:
+        lower (ndarray):        Sub-diagonal; lower[0] is ignored
+        diag (ndarray):         Main diagonal
+        upper (ndarray):        Super-diagonal; upper[-1] is ignored
+
+    Returns:
+        factors (tuple):        (lower, cp, inv) for solveTridiagonal
+
+    """
+
+    cp = np.empty(diag.shape, dtype='d')
+    inv = np.empty(diag.shape, dtype='d')
+
+    inv[0] = 1.0 / diag[0]
+    cp[0] = upper[0] * inv[0]
+
+    for i in range(1, diag.shape[0]):
+        inv[i] = 1.0 / (diag[i] - lower[i] * cp[i-1])
+        cp[i] = upper[i] * inv[i]
+
+    return (lower, cp, inv)
+
+
+def solveTridiagonal(factors, rhs, out=None):
+    """Solve the stack of tridiagonal systems described by factors along
+    axis 0.  Each Python iteration handles one contiguous row of every
+    system at once.
+
+    Args:
+        factors (tuple):        Result of tridiagonalFactors
+        rhs (ndarray):          Right-hand sides, same shape as the factors
+        out (ndarray):          Optional output (may be rhs itself)
+
+    Returns:
+        x (ndarray):            Solutions
+
+    """
+
+    lower, cp, inv = factors
+
+    if out is None:
+        out = np.empty(rhs.shape, dtype=rhs.dtype)
+
+    # One row of scratch, so that out may alias rhs
+    tmp = np.empty(rhs.shape[1:], dtype=out.dtype)
+
+    np.multiply(rhs[0], inv[0], out=out[0])
+
+    for i in range(1, rhs.shape[0]):
+        np.multiply(lower[i], out[i-1], out=tmp)
+        np.subtract(rhs[i], tmp, out=tmp)
+        np.multiply(tmp, inv[i], out=out[i])
+
+    for i in range(rhs.shape[0] - 2, -1, -1):
+        out[i] -= cp[i] * out[i+1]
+
+    return out
+
+
+def neumannSystem(length, lines, a, pinned=None):
+    """Coefficients of (I - a*d2) along axis 0 with reflecting (Neumann)
+    ends, for 'lines' independent lines of 'length' cells.
+
+    Args:
+        length (int):           Cells per line (size of axis 0)
+        lines (int):            Number of lines (size of axis 1)
+        a (float):              Implicit weight
+        pinned (ndarray):       Optional (length, lines) boolean mask of
+                                cells whose rows become identity rows
+
+    Returns:
+        lower, diag, upper (ndarray): (length, lines) coefficient arrays
+
+    """
+
+    lower = np.full((length, lines), -a, dtype='d')
+    upper = np.full((length, lines), -a, dtype='d')
+    diag = np.full((length, lines), 1 + 2*a, dtype='d')
+
+    lower[0] = 0.0
+    upper[-1] = 0.0
+    diag[0] -= a
+    diag[-1] -= a
+
+    if pinned is not None:
+        lower[pinned] = 0.0
+        upper[pinned] = 0.0
+        diag[pinned] = 1.0
+
+    return lower, diag, upper
+
+
+class ADIStepper:
+    '''Stable implicit stepper for the default diffusion function, with
+    reflecting boundaries and optional fixed (hot/cold) sites.  See the
+    module header for the scheme.
+
+    One step of ADIStepper stands for 'dt' steps of the explicit model, so
+    rates past the explicit limit of 1/8 can be used, up to R = r*dt of
+    MAX_RATE; use ImplicitStepper for larger steps.
+    '''
+
+    # Largest R = r*dt the scheme is accurate for (see the module header)
+    MAX_RATE = 1.0
+
+    def __init__(self, lat, diffusionRate, dt=1, sites=None, dtype='d'):
+        '''Constructor/initializer for ADIStepper.
+
+        Args:
+            lat (matrix):           Initial m x n lattice (copied)
+            diffusionRate (float):  Rate of diffusion per explicit step
+            dt (float):             Explicit steps advanced per step
+            sites (DirichletSites): Optional fixed-temperature sites
+            dtype (dtype):          Precision of the lattice and work
+                                    arrays, float32 or float64
+
+        Raises:
+            ValueError:             diffusionRate*dt is above MAX_RATE
+        '''
+
+        if diffusionRate * dt > self.MAX_RATE:
+            raise ValueError("ADI is only accurate for diffusionRate*dt up "
+                "to %g, not %g; use ImplicitStepper" % (self.MAX_RATE,
+                diffusionRate * dt))
+
+        dtype = diffusionEngine.checkPrecision(dtype)
+        lat = np.asarray(lat, dtype=dtype)
+        m, n = lat.shape
+
+        self.rate = diffusionRate * dt
+        self.sites = sites
+        self.steps = 0
+
+        self.buffer = np.empty((m + 2, n + 2), dtype=dtype)
+        self.interior = self.buffer[1:-1, 1:-1]
+        self.interior[...] = lat
+        if sites is not None:
+            sites(self.interior)
+
+        # Work arrays, in row (m, n) and transposed (n, m) layouts
+        self.work = np.empty((m, n), dtype=dtype)
+        self.diff = np.empty((m, n), dtype=dtype)
+        self.workT = np.empty((n, m), dtype=dtype)
+
+        a = 1.5 * self.rate
+        pinned = sites.mask if sites is not None else np.zeros((m, n), bool)
+
+        # Sweep along each row (E-W coupling) is solved in transposed layout
+        # so both sweeps run over contiguous memory.
+        self.rowFactors = tridiagonalFactors(
+            *neumannSystem(n, m, a, pinned.T))
+        self.colFactors = tridiagonalFactors(
+            *neumannSystem(m, n, a, pinned))
+
+        if sites is not None:
+            sites.compile()
+            self.pinRows, self.pinCols = sites.rows, sites.cols
+            self.pinTemps = sites.fixed
+
+
+    @property
+    def lattice(self):
+        '''Current m x n state (a view; copy it to keep it)'''
+
+        return self.interior
+
+
+    def pin(self, lat, transposed=False):
+        '''Set fixed sites of lat (or of its transpose) to their fixed
+        temperatures, in place.'''
+
+        if self.sites is None:
+            return
+        if transposed:
+            lat[self.pinCols, self.pinRows] = self.pinTemps
+        else:
+            lat[self.pinRows, self.pinCols] = self.pinTemps
+
+
+    def step(self, steps=1):
+        '''Advance the lattice 'steps' ADI steps (each worth dt explicit
+        steps).
+
+        Returns:
+            lattice (matrix):   View of the new state
+        '''
+
+        R = self.rate
+        a = 1.5 * R
+        ext = self.buffer
+        u = self.interior
+
+        for i in range(steps):
+            diffusionEngine.refreshGhosts(ext, 'reflecting')
+
+            # Y0 = (1-8R)u + R*(Moore sum), the explicit step with rate R
+            y = diffusionEngine.mooreSum(ext, out=self.work)
+            y *= R
+            y += (1 - 8*R) * u
+
+            # Y1: (I - a dx2) Y1 = Y0 - a*dx2(u), solved per row
+            np.add(ext[1:-1, 2:], ext[1:-1, :-2], out=self.diff)
+            self.diff -= 2 * u
+            self.diff *= a
+            y -= self.diff
+
+            np.copyto(self.workT, y.T)
+            self.pin(self.workT, transposed=True)
+            solveTridiagonal(self.rowFactors, self.workT, out=self.workT)
+            np.copyto(y, self.workT.T)
+
+            # Y2: (I - a dy2) Y2 = Y1 - a*dy2(u), solved per column
+            np.add(ext[2:, 1:-1], ext[:-2, 1:-1], out=self.diff)
+            self.diff -= 2 * u
+            self.diff *= a
+            y -= self.diff
+
+            self.pin(y)
+            solveTridiagonal(self.colFactors, y, out=u)
+
+            self.steps += 1
+
+        return self.lattice
+
+
+# Steady state
+# ------------
+# At equilibrium every free cell satisfies L8(u) = 0 (the explicit update no
+# longer changes it) while hot/cold sites hold their temperatures.  Writing
+# u = x + p, with p the fixed temperatures (0 elsewhere) and x the unknown
+# free temperatures (0 at fixed sites), gives the symmetric positive definite
+# system  A x = L8(p)  on the free cells, A = -L8 with reflecting boundaries.
+# steadyState solves it with conjugate gradients, preconditioned by one
+# geometric multigrid V-cycle.
+
+
+class _Level:
+    '''One grid level of the multigrid preconditioner'''
+
+    def __init__(self, free):
+        self.free = free.astype('d')
+        m, n = free.shape
+        self.buffer = np.zeros((m + 2, n + 2), dtype='d')
+        self.out = np.empty((m, n), dtype='d')
+        self.coarse = None
+
+        if min(m, n) > 4 and free.any():
+            # A coarse cell is fixed if any of its 2 x 2 children is
+            pinnedC = _blockReduce(~free, np.any)
+            if (~pinnedC).any():
+                self.coarse = _Level(~pinnedC)
+
+
+def _blockReduce(a, func):
+    '''Reduce 2 x 2 blocks of a (zero/False-padded to even size) with func'''
+
+    m, n = a.shape
+    padded = np.zeros((m + m % 2, n + n % 2), dtype=a.dtype)
+    padded[:m, :n] = a
+
+    return func(padded.reshape(padded.shape[0]//2, 2, padded.shape[1]//2, 2),
+        axis=(1, 3))
+
+
+def applyLaplace(x, level, out=None, shift=0.0):
+    '''Apply A = 8 - (Moore sum), with reflecting boundaries, to x and zero
+    the result at fixed cells; with a shift, apply shift + A instead.
+
+    Args:
+        x (ndarray):        m x n lattice (0 at fixed cells)
+        level (_Level):     Level holding the free mask and a padded buffer
+        out (ndarray):      Optional output array
+        shift (float):      Multiple of the identity added to A
+
+    Returns:
+        Ax (ndarray):       m x n result
+    '''
+
+    if out is None:
+        out = np.empty(x.shape, dtype='d')
+
+    buf = level.buffer
+    buf[1:-1, 1:-1] = x
+    diffusionEngine.refreshGhosts(buf, 'reflecting')
+    diffusionEngine.mooreSum(buf, out=out)
+
+    np.subtract((8 + shift) * x, out, out=out)
+    out *= level.free
+
+    return out
+
+
+def _vCycle(level, b, sweeps=2, omega=0.8, shift=0.0):
+    '''Approximately solve (shift + A) x = b on level with one multigrid
+    V-cycle: damped Jacobi smoothing, 2 x 2 block restriction of the
+    residual and piecewise-constant prolongation of the coarse correction.
+    The cycle is symmetric, so it can precondition conjugate gradients.'''
+
+    weight = omega / (8.0 + shift)
+    x = weight * b
+
+    for i in range(sweeps - 1):
+        x += weight * (b - applyLaplace(x, level, level.out, shift))
+
+    if level.coarse is not None:
+        m, n = b.shape
+        r = b - applyLaplace(x, level, level.out, shift)
+
+        # The stencil on a grid twice as coarse is ~4 times as strong, so
+        # the coarse right-hand side is the sum (not mean) of the children,
+        # and the shift is scaled to match
+        rc = _blockReduce(r, np.sum) * level.coarse.free
+        ec = _vCycle(level.coarse, rc, sweeps, omega, 4 * shift)
+
+        x += np.repeat(np.repeat(ec, 2, axis=0), 2, axis=1)[:m, :n] * \
+            level.free
+
+    for i in range(sweeps):
+        x += weight * (b - applyLaplace(x, level, level.out, shift))
+
+    return x
+
+
+def _conjugateGradient(level, b, x, tol, maxIter, multigrid, shift=0.0):
+    '''Solve (shift + A) x = b on the free cells of level by conjugate
+    gradients from the guess x (updated in place), until max |residual| is
+    at most tol.
+
+    Returns:
+        x (ndarray):        Solution
+        iterations (int):   Iterations taken
+    '''
+
+    r = b - applyLaplace(x, level, shift=shift)
+    z = _vCycle(level, r, shift=shift) if multigrid else r.copy()
+    d = z.copy()
+    rz = np.vdot(r, z)
+    Ad = np.empty(x.shape, dtype='d')
+
+    iterations = 0
+    while np.max(np.abs(r)) > tol and iterations < maxIter:
+        applyLaplace(d, level, Ad, shift)
+        alpha = rz / np.vdot(d, Ad)
+
+        x += alpha * d
+        r -= alpha * Ad
+
+        z = _vCycle(level, r, shift=shift) if multigrid else r
+        rzNew = np.vdot(r, z)
+        d *= rzNew / rz
+        d += z
+        rz = rzNew
+
+        iterations += 1
+
+    return x, iterations
+
+
+def steadyState(lat, sites, tol=1e-8, maxIter=10000, multigrid=True):
+    '''Solve directly for the equilibrium temperatures of the diffusion
+    model with reflecting boundaries and fixed (hot/cold) sites.
+
+    Args:
+        lat (matrix):           m x n starting guess (e.g. the initial bar
+                                or a partly diffused one)
+        sites (DirichletSites): Fixed-temperature sites
+        tol (float):            Stop when max |L8(u)| over free cells (the
+                                change one explicit step at rate 1 would
+                                make) is below tol
+        maxIter (int):          Maximum conjugate gradient iterations
+        multigrid (bool):       Precondition with a multigrid V-cycle
+
+    Returns:
+        u (matrix):             m x n equilibrium lattice (float)
+        iterations (int):       Conjugate gradient iterations taken
+
+    '''
+
+    u = np.array(lat, dtype='d')
+
+    if sites is None or len(sites) == 0:
+        # Nothing is held fixed: heat is only redistributed, and the
+        # equilibrium is the mean temperature everywhere.
+        u.fill(np.mean(u))
+        return u, 0
+
+    free = ~sites.mask
+    level = _Level(free)
+
+    p = np.zeros(u.shape, dtype='d')
+    sites(p)
+    x = u * level.free
+
+    # b = L8(p) on free cells = -A p
+    b = -applyLaplace(p, level)
+    b *= level.free
+
+    x, iterations = _conjugateGradient(level, b, x, tol, maxIter, multigrid)
+
+    return x + p, iterations
+
+
+class ImplicitStepper:
+    '''Backward Euler stepper for the default diffusion function, with
+    reflecting boundaries and optional fixed (hot/cold) sites.  See the
+    module header for the scheme.
+
+    One step stands for 'dt' steps of the explicit model, for any dt: the
+    lattice never overshoots the initial and fixed temperatures.  Each step
+    is a multigrid-preconditioned conjugate gradient solve, warm-started
+    from the previous state.
+    '''
+
+    def __init__(self, lat, diffusionRate, dt=1, sites=None, dtype='d',
+            tol=1e-6, maxIter=1000):
+        '''Constructor/initializer for ImplicitStepper.
+
+        Args:
+            lat (matrix):           Initial m x n lattice (copied)
+            diffusionRate (float):  Rate of diffusion per explicit step
+            dt (float):             Explicit steps advanced per step
+            sites (DirichletSites): Optional fixed-temperature sites
+            dtype (dtype):          Precision of the lattice, float32 or
+                                    float64 (the solve is in float64)
+            tol (float):            Largest temperature residual left by
+                                    each solve
+            maxIter (int):          Maximum iterations per solve
+        '''
+
+        dtype = diffusionEngine.checkPrecision(dtype)
+        lat = np.asarray(lat, dtype='d')
+
+        self.rate = diffusionRate * dt
+        self.tol = tol
+        self.maxIter = maxIter
+        self.steps = 0
+        self.iterations = 0
+
+        free = np.ones(lat.shape, bool) if sites is None else ~sites.mask
+        self.level = _Level(free)
+
+        # Fixed temperatures p, and the free unknowns x = u - p
+        self.fixed = np.zeros(lat.shape, dtype='d')
+        if sites is not None:
+            sites(self.fixed)
+        self.x = lat * self.level.free
+
+        # (I - R*L8)(x + p) = u on free cells, divided by R:
+        #   (1/R + A) x = u/R - A p
+        self.shift = 1.0 / self.rate
+        self.bFixed = -applyLaplace(self.fixed, self.level)
+
+        self.interior = np.empty(lat.shape, dtype=dtype)
+        np.add(self.x, self.fixed, out=self.interior, casting='unsafe')
+
+
+    @property
+    def lattice(self):
+        '''Current m x n state (a view; copy it to keep it)'''
+
+        return self.interior
+
+
+    def step(self, steps=1):
+        '''Advance the lattice 'steps' backward Euler steps (each worth dt
+        explicit steps).
+
+        Returns:
+            lattice (matrix):   View of the new state
+        '''
+
+        for i in range(steps):
+            b = self.x * self.shift
+            b += self.bFixed
+
+            # The residual is in units of shift times temperature
+            self.x, iterations = _conjugateGradient(self.level, b, self.x,
+                self.tol * self.shift, self.maxIter, True, self.shift)
+
+            self.iterations += iterations
+            self.steps += 1
+
+        np.add(self.x, self.fixed, out=self.interior, casting='unsafe')
+
+        return self.lattice
+
+
+def periodicMultiplier(shape, diffusionRate):
+    '''Fourier multiplier of one explicit step with periodic boundaries,
+    laid out like np.fft.rfft2 of an m x n lattice.
+
+    Args:
+        shape (tuple):          Lattice shape (..., m, n)
+        diffusionRate (float):  Rate of diffusion
+
+    Returns:
+        g (ndarray):            (m, n//2 + 1) real multiplier
+    '''
+
+    m, n = shape[-2:]
+    cosY = np.cos(2 * np.pi * np.fft.fftfreq(m))[:, np.newaxis]
+    cosX = np.cos(2 * np.pi * np.fft.rfftfreq(n))[np.newaxis, :]
+
+    mooreSymbol = (1 + 2*cosY) * (1 + 2*cosX) - 1
+
+    return (1 - 8*diffusionRate) + diffusionRate * mooreSymbol
+
+
+def _noSites(sites):
+    return sites is None or len(sites) == 0
+
+
+def spectralAdvance(lat, diffusionRate, steps, sites=None):
+    '''Advance a periodic lattice exactly 'steps' explicit steps of the
+    default diffusion function in one FFT round trip.
+
+    Hot/cold sites break the convolution structure; when any are given the
+    lattice is stepped with diffusionEngine.DiffusionStepper instead.
+
+    Args:
+        lat (matrix):           m x n lattice, or (..., m, n) stack
+        diffusionRate (float):  Rate of diffusion
+        steps (int):            Number of explicit steps
+        sites (DirichletSites): Optional fixed-temperature sites
+
+    Returns:
+        lat (matrix):           Lattice after 'steps' steps (float)
+    '''
+
+    lat = np.asarray(lat, dtype='d')
+
+    if not _noSites(sites):
+        stepper = diffusionEngine.DiffusionStepper(lat, diffusionRate,
+            diffusionEngine.arrayDiffusion, 'periodic', pins=sites)
+        return np.array(stepper.step(steps))
+
+    g = periodicMultiplier(lat.shape, diffusionRate)
+    spectrum = np.fft.rfft2(lat) * g ** steps
+
+    return np.fft.irfft2(spectrum, s=lat.shape[-2:])
+
+
+def spectralEvolve(lat, diffusionRate, t):
+    '''Continuous-time solution du/dt = r*L8(u) of a periodic lattice at
+    time t (in units of explicit steps), for any real t >= 0.
+
+    Args:
+        lat (matrix):           m x n lattice, or (..., m, n) stack
+        diffusionRate (float):  Rate of diffusion
+        t (float):              Time to evolve to
+
+    Returns:
+        lat (matrix):           Lattice at time t (float)
+    '''
+
+    lat = np.asarray(lat, dtype='d')
+
+    # g - 1 = r*(Moore symbol - 8), the rate of each Fourier mode
+    rates = periodicMultiplier(lat.shape, diffusionRate) - 1
+    spectrum = np.fft.rfft2(lat) * np.exp(t * rates)
+
+    return np.fft.irfft2(spectrum, s=lat.shape[-2:])
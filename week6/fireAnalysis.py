@@ -0,0 +1,559 @@
+#!/usr/bin/env python3
+
+# fireAnalysis.py
+#
+# Author: Martin Metke
+# Date: 2026/10/19
+# For: CSS458A Week 6 Problem2 (performance)
+#
+# Analysis tools for the fire cellular automaton, built on fireEngine.
+#
+# Fire.py's main() reruns the whole simulation for every time horizon t it
+# reports on (5 steps; 10 and 20 in the discussion).  Here each run instead
+# yields the time every site catches fire (its first-passage or arrival
+# time), and the burned fraction at every horizon is read off that one map.
+#
+# Under spread(), a site burns for exactly one step, and a TREE gets one
+# ignition trial (probability burnProb) in each step after which one of its
+# von Neumann neighbours was BURNING.  Every transit thus takes one step,
+# so the Dijkstra order of the first-passage problem (settle sites by
+# increasing arrival time) is simply the fire front level by level: the
+# sites settled at time t are those ignited by a trial of the sites settled
+# at t - 1.  One trial is drawn per (site, step), shared by all neighbours
+# burning in that step, which makes the arrival map exactly as distributed
+# as the arrival times of the stepped automaton.
+#
+# fireCluster answers "how much burns in the end" without stepping at all,
+# by labelling the ignition site's cluster in a site-bond percolation
+# sample with a union-find; percolationStats and criticalProbability build
+# burned-fraction, spanning and threshold estimates on it.
+#
+# fireSweep runs many fires and streams every step into Reducers
+# (BurnedFraction, BurningCount, BurnTimeHistogram) instead of storing the
+# grids of every run of every probability, as main() does.  tensorSweep
+# instead advances all (probability, run) pairs of a sweep together as one
+# stack of forests.
+
+#============================= IMPORTS =======================================
+import numpy as np
+
+import fireEngine
+#============================= END IMPORTS ===================================
+
+
+# Arrival time of sites that never catch fire
+NEVER = -1
+
+
+def arrivalTimes(forest, burnProb, seed=None, boundary='periodic',
+        maxTime=None, wind=None):
+    '''Compute the step at which every site of forest catches fire, in one
+    pass over the fire front (see the module header).
+
+    Args:
+        forest (matrix):        Initial m x n forest
+        burnProb (float/array): Probability that a tree next to a fire
+                                catches fire in one step, or an m x n
+                                raster of them
+        seed (int/Generator):   Seed or Generator for the random draws
+        boundary (str):         'periodic' or 'fixed'
+        maxTime (int):          Stop after this many steps (default: when
+                                the fire has gone out)
+        wind (list):            Optional wind factors (see
+                                fireEngine.windFactors)
+
+    Returns:
+        arrival (ndarray):      m x n int32 array; 0 for sites burning at
+                                the start, t for sites that catch fire at
+                                step t, NEVER for the rest
+    '''
+
+    stepper = fireEngine.FrontierFireStepper(forest, burnProb, seed,
+        boundary, wind)
+
+    arrival = np.full(stepper.forest.shape, NEVER, dtype=np.int32)
+    flat = arrival.reshape(-1)
+    flat[stepper.front] = 0
+
+    while not stepper.extinct() and \
+            (maxTime is None or stepper.steps < maxTime):
+        stepper.step()
+        flat[stepper.front] = stepper.steps
+
+    return arrival
+
+
+def burnedCurve(forest, arrival, horizon=None):
+    '''Burned fraction (sites that are not TREE, as in Fire.py) at every
+    time from 0 to horizon, read off an arrival map.
+
+    Args:
+        forest (matrix):        Initial forest the arrival map is for
+        arrival (matrix):       Arrival map from arrivalTimes
+        horizon (int):          Last time (default: the last arrival)
+
+    Returns:
+        curve (ndarray):        curve[t] = burned fraction after t steps
+    '''
+
+    forest = np.asarray(forest)
+    arrival = np.asarray(arrival)
+
+    if horizon is None:
+        horizon = max(int(arrival.max()), 0)
+
+    # Sites other than TREE at the start count as burned from time 0;
+    # trees count from the step they catch fire
+    ignited = arrival[(forest == fireEngine.TREE) & (arrival > 0)]
+    counts = np.bincount(np.minimum(ignited, horizon + 1),
+        minlength=horizon + 2)[:horizon + 1]
+    counts[0] += np.count_nonzero(forest != fireEngine.TREE)
+
+    return np.cumsum(counts) / forest.size
+
+
+def burnCurves(n, burnProbs, runs, horizon, seed=None, probTree=1.0):
+    '''Average burned fraction at every horizon 0 .. horizon for each burn
+    probability, as Fire.py's main() reports for one horizon, from one
+    arrival map per run.
+
+    Args:
+        n (int):                Side of the forest
+        burnProbs (list):       Burn probabilities to evaluate
+        runs (int):             Runs averaged per probability
+        horizon (int):          Last time step reported
+        seed (int):             Seed for the whole experiment
+        probTree (float):       Tree density of the initial forests
+
+    Returns:
+        curves (ndarray):       (len(burnProbs), horizon + 1) mean burned
+                                fractions
+    '''
+
+    rng = np.random.default_rng(seed)
+    curves = np.zeros((len(burnProbs), horizon + 1))
+
+    for i, burnProb in enumerate(burnProbs):
+        for run in range(runs):
+            forest = fireEngine.initForestArray(n, probTree, seed=rng)
+            arrival = arrivalTimes(forest, burnProb, rng, maxTime=horizon)
+            curves[i] += burnedCurve(forest, arrival, horizon)
+
+    return curves / runs
+
+
+class UnionFind:
+    '''Disjoint-set forest over the integers 0 .. size-1, with unions
+    applied a whole array of pairs at a time.
+
+    Each round hooks the larger of the two roots of every pair still
+    spanning two sets onto the smaller (np.minimum.at, so conflicting hooks
+    resolve to the smallest root) and then compresses every path fully by
+    pointer jumping; rounds repeat until no pair spans two sets.  The root
+    of a set is thus its smallest member.
+    '''
+
+    def __init__(self, size):
+        '''Constructor/initializer for UnionFind.
+
+        Args:
+            size (int):         Number of elements
+        '''
+
+        self.parent = np.arange(size, dtype=np.intp)
+
+
+    def compress(self):
+        '''Point every element straight at its root.'''
+
+        parent = self.parent
+        while True:
+            grand = parent[parent]
+            if np.array_equal(grand, parent):
+                break
+            parent[...] = grand
+
+
+    def find(self, elements):
+        '''Roots of an array of elements'''
+
+        self.compress()
+
+        return self.parent[elements]
+
+
+    def union(self, a, b):
+        '''Merge the sets of a[k] and b[k] for every k.'''
+
+        a = np.asarray(a, dtype=np.intp)
+        b = np.asarray(b, dtype=np.intp)
+
+        while len(a):
+            ra = self.find(a)
+            rb = self.find(b)
+
+            apart = ra != rb
+            a, b, ra, rb = a[apart], b[apart], ra[apart], rb[apart]
+
+            np.minimum.at(self.parent, np.maximum(ra, rb),
+                np.minimum(ra, rb))
+
+
+def fireCluster(forest, burnProb, seed=None, boundary='periodic'):
+    '''Label the sites the fire can reach from the initially BURNING sites,
+    without stepping, as a site-bond percolation cluster.
+
+    Occupied sites are those that are not EMPTY; each bond between
+    occupied von Neumann neighbours is open with probability burnProb, and
+    the cluster is everything joined to a burning site by open bonds.  This
+    is the percolation picture of the fire: a burning site gets one chance
+    to ignite each neighbouring tree.  In spread() a tree next to several
+    sites burning in the same step gets only one draw, so the stepped fire
+    burns less than the cluster, noticeably so near the transition; the
+    threshold found from clusters is that of the percolation model and a
+    low estimate for the stepped fire.
+
+    Args:
+        forest (matrix):        Initial m x n forest
+        burnProb (float):       Bond open probability
+        seed (int/Generator):   Seed or Generator for the bonds
+        boundary (str):         'periodic' (bonds wrap around) or 'fixed'
+
+    Returns:
+        cluster (ndarray):      m x n bool array of the sites that burn
+    '''
+
+    forest = np.asarray(forest)
+    m, n = forest.shape
+    rng = np.random.default_rng(seed)
+
+    occupied = (forest != fireEngine.EMPTY).reshape(-1)
+    ids = np.arange(m * n).reshape(m, n)
+
+    # Bonds to the east and south neighbour of every site
+    if boundary == 'periodic':
+        pairs = ((ids, np.roll(ids, -1, axis=1)),
+                 (ids, np.roll(ids, -1, axis=0)))
+    else:
+        pairs = ((ids[:, :-1], ids[:, 1:]), (ids[:-1], ids[1:]))
+
+    a = np.concatenate([first.reshape(-1) for first, second in pairs])
+    b = np.concatenate([second.reshape(-1) for first, second in pairs])
+
+    # One uniform per bond whatever the sites hold, so that the same seed
+    # gives nested clusters as burnProb grows
+    bonds = rng.random(len(a)) < burnProb
+    bonds &= occupied[a] & occupied[b]
+
+    sets = UnionFind(m * n)
+    sets.union(a[bonds], b[bonds])
+
+    roots = sets.find(np.arange(m * n))
+    ignition = np.unique(roots[(forest == fireEngine.BURNING).reshape(-1)])
+
+    return (np.isin(roots, ignition) & occupied).reshape(m, n)
+
+
+def spans(cluster):
+    '''True if cluster touches both the top and bottom rows, or both the
+    left and right columns.'''
+
+    return bool((cluster[0].any() and cluster[-1].any()) or
+        (cluster[:, 0].any() and cluster[:, -1].any()))
+
+
+def percolationStats(n, burnProb, probTree=1.0, runs=100, seed=None,
+        boundary='fixed'):
+    '''Final burned fraction and spanning probability of fires started in
+    the center of n x n forests, from fireCluster.
+
+    The same seed gives the same forests and bond draws at every burnProb,
+    so both statistics are monotone in burnProb for a fixed seed.
+
+    Returns:
+        burned (float):         Mean fraction of sites that are not TREE
+                                once the fire is out
+        spanning (float):       Fraction of runs whose cluster spans
+    '''
+
+    rng = np.random.default_rng(seed)
+    burned = 0.0
+    spanning = 0
+
+    for run in range(runs):
+        forest = fireEngine.initForestArray(n, probTree, seed=rng)
+        cluster = fireCluster(forest, burnProb, rng, boundary)
+
+        burned += (np.count_nonzero(forest == fireEngine.EMPTY) +
+            np.count_nonzero(cluster)) / forest.size
+        spanning += spans(cluster)
+
+    return burned / runs, spanning / runs
+
+
+def criticalProbability(n, probTree=1.0, runs=100, seed=0, target=0.5,
+        tol=0.005, boundary='fixed'):
+    '''Bisect for the burn probability at which a fraction 'target' of
+    fires span the forest, an estimate of the percolation threshold.
+
+    Every evaluation reuses the same seed (common random numbers), which
+    makes the spanning fraction monotone in burnProb, so bisection is
+    well defined.
+
+    Returns:
+        burnProb (float):       Estimated critical probability
+    '''
+
+    lo, hi = 0.0, 1.0
+
+    while hi - lo > tol:
+        mid = (lo + hi) / 2
+        spanning = percolationStats(n, mid, probTree, runs, seed,
+            boundary)[1]
+        if spanning < target:
+            lo = mid
+        else:
+            hi = mid
+
+    return (lo + hi) / 2
+
+
+class Reducer:
+    '''Base class of the reducers fireSweep streams runs into.
+
+    Reducers are fed every step of every run and keep only what they
+    report, so no grid outlives its step.  The interface is
+    start(forest, steps) at the start of a run, record(step, forest) for
+    step 0 and every step after, finish(step, forest) at the end of the run
+    and result() once all runs are done.  Leading (replicate) axes of the
+    forest are reduced over as separate runs.  Every hook does nothing
+    here; subclasses override the ones they need.
+    '''
+
+    def start(self, forest, steps):
+        pass
+
+
+    def record(self, step, forest):
+        pass
+
+
+    def finish(self, step, forest):
+        pass
+
+
+    def result(self):
+        return None
+
+
+class BurnedFraction(Reducer):
+    '''Reducer: final burned fraction (sites that are not TREE) of every
+    run, as Fire.py's main() computes from the last grid.'''
+
+    def __init__(self):
+        '''Constructor/initializer for BurnedFraction.'''
+
+        self.values = []
+
+
+    def finish(self, step, forest):
+        self.values.extend(np.ravel(fireEngine.burnedFraction(forest)))
+
+
+    def result(self):
+        '''Return the burned fraction of every run'''
+
+        return np.array(self.values)
+
+
+class BurningCount(Reducer):
+    '''Reducer: mean number of BURNING sites at every step, over all runs
+    (runs that have stopped count as 0).'''
+
+    def __init__(self):
+        '''Constructor/initializer for BurningCount.'''
+
+        self.total = np.zeros(0)
+        self.runs = 0
+
+
+    def start(self, forest, steps):
+        self.counts = []
+
+
+    def record(self, step, forest):
+        counts = np.count_nonzero(forest == fireEngine.BURNING, axis=(-2, -1))
+        self.counts.append(np.sum(counts))
+
+
+    def finish(self, step, forest):
+        counts = np.array(self.counts, dtype='d')
+
+        if len(counts) > len(self.total):
+            self.total = np.pad(self.total, (0, len(counts) - len(self.total)))
+        self.total[:len(counts)] += counts
+        self.runs += int(np.prod(np.shape(forest)[:-2]))
+
+
+    def result(self):
+        '''Return the mean BURNING count per step'''
+
+        return self.total / max(self.runs, 1)
+
+
+class BurnTimeHistogram(Reducer):
+    '''Reducer: histogram of how many steps each run's fire burned (the
+    last step at which a site was BURNING).'''
+
+    def __init__(self):
+        '''Constructor/initializer for BurnTimeHistogram.'''
+
+        self.durations = []
+
+
+    def start(self, forest, steps):
+        self.last = np.zeros(np.shape(forest)[:-2], dtype=int)
+
+
+    def record(self, step, forest):
+        burning = np.any(forest == fireEngine.BURNING, axis=(-2, -1))
+        self.last[burning] = step
+
+
+    def finish(self, step, forest):
+        self.durations.extend(np.ravel(self.last))
+
+
+    def result(self):
+        '''Return counts[d] = number of runs whose fire burned d steps'''
+
+        return np.bincount(np.array(self.durations, dtype=int))
+
+
+def fireSweep(n, burnProbs, runs, t=None, reducers=None, seed=None,
+        probTree=1.0, engine='array', boundary='periodic'):
+    '''Run 'runs' fires at each burn probability, streaming every step into
+    reducers instead of keeping grids: only one forest (the stepper's) is
+    alive at a time.
+
+    Args:
+        n (int):                Side of the forest
+        burnProbs (list):       Burn probabilities to evaluate
+        runs (int):             Runs per probability
+        t (int):                Steps per run (default: until the fire is
+                                out)
+        reducers (dict):        Name -> Reducer subclass (or other callable
+                                returning a fresh Reducer); one reducer is
+                                made per probability.  Default:
+                                {'burned': BurnedFraction}
+        seed (int):             Seed for the whole sweep
+        probTree (float):       Tree density of the initial forests
+        engine (str):           Stepper in fireEngine.ENGINES
+        boundary (str):         'periodic' or 'fixed'
+
+    Returns:
+        results (dict):         Name -> list of the reducer's result for
+                                each probability
+    '''
+
+    if reducers is None:
+        reducers = {'burned': BurnedFraction}
+
+    rng = np.random.default_rng(seed)
+    results = {name: [] for name in reducers}
+
+    for burnProb in burnProbs:
+        active = {name: make() for name, make in reducers.items()}
+
+        for run in range(runs):
+            forest = fireEngine.initForestArray(n, probTree, seed=rng)
+            stepper = fireEngine.ENGINES[engine](forest, burnProb, rng,
+                boundary)
+
+            for reducer in active.values():
+                reducer.start(forest, t)
+                reducer.record(0, forest)
+
+            while (t is None and not stepper.extinct()) or \
+                    (t is not None and stepper.steps < t):
+                stepper.step()
+                lattice = stepper.lattice
+                for reducer in active.values():
+                    reducer.record(stepper.steps, lattice)
+
+            for reducer in active.values():
+                reducer.finish(stepper.steps, stepper.lattice)
+
+        for name, reducer in active.items():
+            results[name].append(reducer.result())
+
+    return results
+
+
+def tensorSweep(n, burnProbs, runs, t=None, seed=None, probTree=1.0,
+        boundary='periodic', maxCells=1 << 24, compactEvery=10):
+    '''Mean final burned fraction at each burn probability, with all
+    (probability, run) pairs advanced together as one stack of forests by a
+    single FireStepper (burnProb broadcast per forest).
+
+    Runs are processed in batches of at most maxCells cells, so memory is
+    bounded however fine the sweep.  When running to extinction, forests
+    whose fire is out are dropped from the stack every compactEvery steps,
+    so a few long fires do not keep the whole batch stepping.
+
+    Args:
+        n (int):                Side of the forest
+        burnProbs (list):       P burn probabilities to evaluate
+        runs (int):             R runs per probability
+        t (int):                Steps per run (default: until every fire
+                                is out)
+        seed (int):             Seed for the whole sweep
+        probTree (float):       Tree density of the initial forests
+        boundary (str):         'periodic' or 'fixed'
+        maxCells (int):         Largest number of cells stepped at once
+        compactEvery (int):     Steps between drops of finished forests
+
+    Returns:
+        burned (ndarray):       (P,) mean burned fraction per probability
+    '''
+
+    rng = np.random.default_rng(seed)
+    burnProbs = np.asarray(burnProbs, dtype='d')
+    numProbs = len(burnProbs)
+
+    batch = max(1, min(runs, maxCells // max(numProbs * n * n, 1)))
+    total = np.zeros(numProbs)
+
+    for first in range(0, runs, batch):
+        count = min(batch, runs - first)
+
+        # The (P, count) pairs flattened, each forest with its probability
+        forest = fireEngine.initForestArray(n, probTree, seed=rng,
+            stack=(numProbs * count,))
+        which = np.repeat(np.arange(numProbs), count)
+
+        while True:
+            stepper = fireEngine.FireStepper(forest,
+                burnProbs[which, None, None], rng, boundary)
+
+            if t is not None:
+                stepper.step(t)
+                break
+
+            while not stepper.extinct() and stepper.steps < compactEvery:
+                stepper.step()
+
+            forest = stepper.lattice
+            alive = np.any(forest == fireEngine.BURNING, axis=(-2, -1))
+            if not alive.any():
+                break
+
+            # Bank the finished forests, keep stepping the rest
+            np.add.at(total, which[~alive],
+                fireEngine.burnedFraction(forest[~alive]))
+            forest = np.array(forest[alive])
+            which = which[alive]
+
+        np.add.at(total, which, fireEngine.burnedFraction(stepper.lattice))
+
+    return total / runs
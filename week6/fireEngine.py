@@ -0,0 +1,1034 @@
+#!/usr/bin/env python3
+
+# fireEngine.py
+#
+# Author: Martin Metke
+# Date: 2026/10/19
+# For: CSS458A Week 6 Problem2 (performance)
+#
+# Array-level engine for the fire cellular automaton in Fire.py and
+# problem2.py.  The forest is a uint8 array instead of a list of lists, and
+# a step updates every cell at once instead of calling spread() per cell:
+#   - the periodic border is a one-cell ghost layer of a padded buffer,
+#     refreshed in place (no extendLat copy),
+#   - "tree with a BURNING von Neumann neighbour" is one boolean mask built
+#     from four shifted views of the padded buffer,
+#   - the random numbers for a whole step are drawn in one bulk call from a
+#     seedable numpy Generator,
+#   - two padded buffers are swapped every step (double buffering), with all
+#     boolean scratch arrays allocated once.
+# FrontierFireStepper instead keeps only the burning cells and touches just
+# their neighbourhoods, for sparse fires in very large forests.
+# PackedFireStepper stores the forest as two bit-planes of uint64 words
+# (2 bits per cell) and steps 64 cells per word operation, for forests of
+# billions of cells.  RuleFireStepper evaluates any rule (Moore
+# neighbourhood, regrowth, lightning) compiled by compileRule into a table
+# indexed by the neighbourhood configuration.
+#
+# Landscapes: forestFromDensity builds a forest from a per-cell tree density
+# raster and FireStepper and FrontierFireStepper take a per-cell burnProb
+# raster, both of which can be memory-mapped files (loadRaster);
+# windFactors gives each von Neumann direction its own ignition factor.
+#
+# Rules, as in spread():
+#   EMPTY stays EMPTY; BURNING becomes EMPTY; a TREE with a BURNING N, E, S
+#   or W neighbour catches fire with probability burnProb; otherwise a TREE
+#   stays a TREE.
+
+#============================= IMPORTS =======================================
+import numpy as np
+
+import diffusionEngine
+#============================= END IMPORTS ===================================
+
+
+# Site values, as in Fire.py
+EMPTY = 0
+TREE = 1
+BURNING = 2
+
+# von Neumann neighbourhood N, E, S, W as (row, column) offsets
+VON_NEUMANN = ((-1, 0), (0, 1), (1, 0), (0, -1))
+
+
+def initForestArray(n, probTree=1.0, probBurning=0.0, seed=None,
+        center=True, stack=()):
+    '''Return an n x n uint8 forest, the array version of initForest.
+
+    Args:
+        n (int):                Side of the forest
+        probTree (float):       Probability that a site holds a tree
+        probBurning (float):    Probability that a tree is burning
+        seed (int/Generator):   Seed or Generator for the random draws
+        center (bool):          Set the center tree on fire (S&S 10.3.9)
+        stack (tuple):          Leading shape of a stack of independent
+                                forests, e.g. (P, R)
+
+    Returns:
+        forest (ndarray):       stack + (n, n) uint8 array of
+                                EMPTY/TREE/BURNING
+    '''
+
+    rng = np.random.default_rng(seed)
+    shape = tuple(stack) + (n, n)
+    forest = np.full(shape, EMPTY, dtype=np.uint8)
+
+    if probTree >= 1.0:
+        forest.fill(TREE)
+    else:
+        forest[rng.random(shape) < probTree] = TREE
+
+    if probBurning > 0.0:
+        forest[(forest == TREE) & (rng.random(shape) < probBurning)] = BURNING
+
+    if center:
+        forest[..., n // 2, n // 2] = BURNING
+
+    return forest
+
+
+def loadRaster(path, shape=None, dtype='f4', offset=0):
+    '''Open a landscape raster (e.g. per-cell tree density or ignition
+    probability) as a read-only memory map, so only the parts used are
+    read from disk.
+
+    Args:
+        path (str):             .npy file, or a headerless raw file
+        shape (tuple):          (m, n) of a raw file
+        dtype (dtype):          Element type of a raw file
+        offset (int):           Bytes to skip at the start of a raw file
+
+    Returns:
+        raster (memmap):        m x n read-only array
+    '''
+
+    if str(path).endswith('.npy'):
+        return np.load(path, mmap_mode='r')
+
+    return np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=shape)
+
+
+def forestFromDensity(density, seed=None, center=True, rows=1024):
+    '''Return a uint8 forest with a tree at each site with that site's
+    probability in density (e.g. a raster from loadRaster), generated a
+    block of rows at a time so that a memory-mapped raster is streamed
+    rather than loaded whole.
+
+    Args:
+        density (matrix):       m x n tree probabilities
+        seed (int/Generator):   Seed or Generator for the random draws
+        center (bool):          Set the center tree on fire
+        rows (int):             Rows generated at once
+
+    Returns:
+        forest (ndarray):       m x n uint8 array of EMPTY/TREE/BURNING
+    '''
+
+    rng = np.random.default_rng(seed)
+    m, n = np.shape(density)
+    forest = np.empty((m, n), dtype=np.uint8)
+
+    for r0 in range(0, m, rows):
+        r1 = min(r0 + rows, m)
+        draws = rng.random((r1 - r0, n), dtype=np.float32)
+        np.less(draws, density[r0:r1], out=draws, casting='unsafe')
+        forest[r0:r1] = draws
+
+    if center:
+        forest[m // 2, n // 2] = BURNING
+
+    return forest
+
+
+def windFactors(direction, strength):
+    '''Wind factors for FireStepper: fire spreads more readily with the
+    wind and less against it.
+
+    Args:
+        direction (str):        Where the wind blows from: 'N', 'E', 'S'
+                                or 'W'
+        strength (float):       0 (calm) to 1
+
+    Returns:
+        wind (tuple):           Factors for a BURNING neighbour to the N,
+                                E, S, W: 1 + strength for a neighbour
+                                upwind, 1 - strength downwind, 1 across
+    '''
+
+    order = 'NESW'
+    upwind = order.index(direction)
+
+    factors = [1.0] * 4
+    factors[upwind] = 1.0 + strength
+    factors[(upwind + 2) % 4] = 1.0 - strength
+
+    return tuple(factors)
+
+
+def burnedFraction(forest):
+    '''Fraction of the sites of forest (over its last two axes) that are not
+    TREE, as counted in Fire.py's analysis.'''
+
+    forest = np.asarray(forest)
+
+    return 1.0 - np.count_nonzero(forest == TREE, axis=(-2, -1)) / \
+        (forest.shape[-2] * forest.shape[-1])
+
+
+class FireStepper:
+    '''Advances a forest lattice one step at a time, in place.
+
+    Holds two padded uint8 buffers, the views into them and the boolean and
+    random-number scratch arrays, all allocated once.  The forest may carry
+    leading axes (e.g. an (R, n, n) stack of replicate runs), and burnProb
+    may be an array broadcastable to the forest's shape, so runs at several
+    burn probabilities, or landscapes with per-cell ignition probabilities
+    (see loadRaster), can be advanced together.
+
+    With wind, each direction of the von Neumann neighbourhood gets its own
+    factor on burnProb; a tree ignites with burnProb times the largest
+    factor among the directions it has a BURNING neighbour in.  Factors
+    (1, 1, 1, 1) are spread() exactly.
+    '''
+
+    BOUNDARIES = ('periodic', 'fixed')
+
+    def __init__(self, forest, burnProb, seed=None, boundary='periodic',
+            wind=None):
+        '''Constructor/initializer for FireStepper.
+
+        Args:
+            forest (matrix):        Initial forest, (..., m, n)
+            burnProb (float/array): Probability that a tree next to a fire
+                                    catches fire in one step
+            seed (int/Generator):   Seed or Generator for the random draws
+            boundary (str):         'periodic' (as extendLat) or 'fixed'
+                                    (the forest is surrounded by EMPTY
+                                    ground)
+            wind (list):            Optional factors on burnProb for a
+                                    BURNING neighbour to the N, E, S, W
+                                    (see windFactors)
+
+        Raises:
+            ValueError:             Unknown boundary
+        '''
+
+        if boundary not in self.BOUNDARIES:
+            raise ValueError("boundary must be one of %s, not %r" %
+                (self.BOUNDARIES, boundary))
+
+        forest = np.asarray(forest)
+        shape = forest.shape
+        padded = shape[:-2] + (shape[-2] + 2, shape[-1] + 2)
+
+        self.rng = np.random.default_rng(seed)
+        self.burnProb = np.asarray(burnProb, dtype=np.float32)
+        self.boundary = boundary
+        self.steps = 0
+
+        self.buffers = [np.full(padded, EMPTY, dtype=np.uint8)
+            for i in range(2)]
+        self.patches = [diffusionEngine.stencilPatches(buf, VON_NEUMANN)
+            for buf in self.buffers]
+        self.interiors = [patches[0] for patches in self.patches]
+
+        # Scratch, reused every step
+        self.tree = np.empty(shape, dtype=bool)
+        self.exposed = np.empty(shape, dtype=bool)
+        self.scratch = np.empty(shape, dtype=bool)
+        self.draws = np.empty(shape, dtype=np.float32)
+
+        if wind is None:
+            self.wind = None
+        else:
+            self.wind = np.asarray(wind, dtype=np.float32).reshape(4)
+            self.factor = np.empty(shape, dtype=np.float32)
+            self.weighted = np.empty(shape, dtype=np.float32)
+
+        self.current = 0
+        self.interiors[0][...] = forest
+
+
+    @property
+    def lattice(self):
+        '''Interior (m x n view) of the current state'''
+
+        return self.interiors[self.current]
+
+
+    def extinct(self):
+        '''True once no site is BURNING (in any replicate)'''
+
+        # After a step the BURNING sites are exactly the ignited mask
+        if self.steps == 0:
+            return not np.any(self.lattice == BURNING)
+
+        return not self.exposed.any()
+
+
+    def step(self, steps=1):
+        '''Advance the forest 'steps' steps.
+
+        Returns:
+            lattice (matrix):   View of the new current state.  It is
+                                overwritten two steps later; copy it to
+                                keep it.
+        '''
+
+        for i in range(steps):
+            src = self.current
+            dst = 1 - src
+
+            diffusionEngine.refreshGhosts(self.buffers[src], self.boundary)
+
+            site, N, E, S, W = self.patches[src]
+            exposed, scratch = self.exposed, self.scratch
+
+            np.equal(site, TREE, out=self.tree)
+            self.rng.random(dtype=np.float32, out=self.draws)
+
+            if self.wind is None:
+                # Trees with at least one BURNING von Neumann neighbour
+                np.equal(N, BURNING, out=exposed)
+                for neighbour in (E, S, W):
+                    np.equal(neighbour, BURNING, out=scratch)
+                    np.logical_or(exposed, scratch, out=exposed)
+                np.logical_and(exposed, self.tree, out=exposed)
+
+                # ... of which those whose draw comes in under burnProb
+                # ignite
+                np.less(self.draws, self.burnProb, out=scratch)
+                np.logical_and(exposed, scratch, out=exposed)
+
+            else:
+                # Largest wind factor over the BURNING neighbours
+                factor, weighted = self.factor, self.weighted
+                factor.fill(0)
+                for neighbour, strength in zip((N, E, S, W), self.wind):
+                    np.equal(neighbour, BURNING, out=scratch)
+                    np.multiply(scratch, strength, out=weighted)
+                    np.maximum(factor, weighted, out=factor)
+                np.multiply(factor, self.burnProb, out=factor)
+
+                # Trees whose draw comes in under their ignition chance
+                np.less(self.draws, factor, out=exposed)
+                np.logical_and(exposed, self.tree, out=exposed)
+
+            # TREE (1) + ignited (1) = BURNING (2); EMPTY, BURNING -> EMPTY
+            np.add(self.tree, exposed, out=self.interiors[dst],
+                dtype=np.uint8, casting='unsafe')
+
+            self.current = dst
+            self.steps += 1
+
+        return self.lattice
+
+
+def fireSim(forest, burnProb, t, seed=None, boundary='periodic'):
+    '''Run t steps of the fire model from forest and return every grid, the
+    array version of the run loop in Fire.py's main().
+
+    Returns:
+        grids (ndarray):        (t + 1, ..., m, n) uint8 history
+    '''
+
+    stepper = FireStepper(forest, burnProb, seed, boundary)
+
+    grids = np.empty((t + 1,) + np.shape(forest), dtype=np.uint8)
+    grids[0] = stepper.lattice
+
+    for step in range(t):
+        grids[step + 1] = stepper.step()
+
+    return grids
+
+
+class FrontierFireStepper:
+    '''Advances a 2-D forest by touching only the active fire front.
+
+    Only trees next to a BURNING site can change, so instead of rescanning
+    the whole lattice the stepper keeps the flat indices of the burning
+    cells.  Each step it generates their von Neumann neighbours, keeps the
+    distinct ones that are still TREE, ignites each with probability
+    burnProb (one draw per candidate tree, as spread() makes one draw per
+    exposed tree) and retires the old front to EMPTY.  The forest is
+    updated in place, so a step costs time proportional to the length of
+    the front rather than the size of the forest; a single ignition in a
+    very large forest stays cheap.
+
+    Same rules, boundaries, per-cell burnProb rasters and wind as
+    FireStepper (a raster is only read at the candidate trees, so a
+    memory-mapped one is never loaded whole); the forest must be 2-D.
+    '''
+
+    BOUNDARIES = FireStepper.BOUNDARIES
+
+    def __init__(self, forest, burnProb, seed=None, boundary='periodic',
+            wind=None):
+        '''Constructor/initializer for FrontierFireStepper.
+
+        Args:
+            forest (matrix):        Initial m x n forest (copied)
+            burnProb (float/array): Probability that a tree next to a fire
+                                    catches fire in one step, or an array
+                                    of them broadcastable to m x n
+            seed (int/Generator):   Seed or Generator for the random draws
+            boundary (str):         'periodic' or 'fixed'
+            wind (list):            Optional factors on burnProb for a
+                                    BURNING neighbour to the N, E, S, W
+                                    (see windFactors)
+
+        Raises:
+            ValueError:             Unknown boundary, or forest is not 2-D
+        '''
+
+        if boundary not in self.BOUNDARIES:
+            raise ValueError("boundary must be one of %s, not %r" %
+                (self.BOUNDARIES, boundary))
+
+        self.forest = np.array(forest, dtype=np.uint8)
+        if self.forest.ndim != 2:
+            raise ValueError("forest must be 2-D, not %i-D" %
+                self.forest.ndim)
+
+        self.rng = np.random.default_rng(seed)
+        self.boundary = boundary
+        self.steps = 0
+
+        if np.ndim(burnProb) == 0:
+            self.burnProb = np.float32(burnProb)
+        else:
+            self.burnProb = np.broadcast_to(burnProb, self.forest.shape)
+
+        if wind is None:
+            self.wind = None
+        else:
+            self.wind = np.asarray(wind, dtype=np.float32).reshape(4)
+
+        # One O(m*n) scan to find the initial front; never again
+        self.front = np.flatnonzero(self.forest == BURNING)
+
+
+    @property
+    def lattice(self):
+        '''Current state (updated in place by step)'''
+
+        return self.forest
+
+
+    def extinct(self):
+        '''True once no site is BURNING'''
+
+        return len(self.front) == 0
+
+
+    def neighbours(self, front, directions=False):
+        '''Flat indices of the von Neumann neighbours of the flat indices in
+        front, with duplicates (wrapped around for 'periodic', dropped past
+        the edge for 'fixed').  With directions, also return for each one
+        the direction (0-3 for N, E, S, W) its front cell lies in.'''
+
+        m, n = self.forest.shape
+        rows, cols = np.divmod(front, n)
+
+        candidates = []
+        sources = []
+        for k, (dr, dc) in enumerate(VON_NEUMANN):
+            r = rows + dr
+            c = cols + dc
+
+            if self.boundary == 'periodic':
+                r %= m
+                c %= n
+            else:
+                inside = (r >= 0) & (r < m) & (c >= 0) & (c < n)
+                r = r[inside]
+                c = c[inside]
+
+            candidates.append(r * n + c)
+            # Stepping N from the front means the front lies S, and so on
+            sources.append(np.full(len(r), (k + 2) % 4, dtype=np.intp))
+
+        if directions:
+            return np.concatenate(candidates), np.concatenate(sources)
+
+        return np.concatenate(candidates)
+
+
+    def ignition(self, candidates, factors=None):
+        '''Ignition probability of each of the distinct candidate trees:
+        burnProb (scalar or raster) times, with wind, their factors (the
+        largest over the directions they have a BURNING neighbour in).'''
+
+        prob = self.burnProb
+        if np.ndim(prob):
+            prob = prob[np.divmod(candidates, self.forest.shape[1])] \
+                .astype(np.float32)
+
+        if factors is not None:
+            prob = prob * factors
+
+        return prob
+
+
+    def step(self, steps=1):
+        '''Advance the forest 'steps' steps.
+
+        Returns:
+            lattice (matrix):   The forest (updated in place)
+        '''
+
+        flat = self.forest.reshape(-1)
+
+        for i in range(steps):
+            if len(self.front) == 0:
+                self.steps += 1
+                continue
+
+            if self.wind is None:
+                candidates = self.neighbours(self.front)
+                candidates = np.unique(candidates[flat[candidates] == TREE])
+                factors = None
+            else:
+                candidates, sources = self.neighbours(self.front, True)
+                isTree = flat[candidates] == TREE
+                candidates = candidates[isTree]
+                factors = self.wind[sources[isTree]]
+
+                # Sort each candidate's factors largest first and keep the
+                # first (largest) of every distinct candidate
+                order = np.lexsort((-factors, candidates))
+                candidates, first = np.unique(candidates[order],
+                    return_index=True)
+                factors = factors[order][first]
+
+            draws = self.rng.random(len(candidates), dtype=np.float32)
+            ignited = candidates[draws < self.ignition(candidates, factors)]
+
+            flat[self.front] = EMPTY
+            flat[ignited] = BURNING
+
+            self.front = ignited
+            self.steps += 1
+
+        return self.forest
+
+
+# Bits per word of the packed representation
+WORD = 64
+
+
+def packForest(forest):
+    '''Pack an m x n forest into two bit-planes of uint64 words.
+
+    Column c of a row is bit c % 64 of word c // 64; the bits past column
+    n - 1 in the last word of each row are always 0.
+
+    Args:
+        forest (matrix):        m x n array of EMPTY/TREE/BURNING
+
+    Returns:
+        tree (ndarray):         m x ceil(n/64) uint64 words, bit set = TREE
+        burning (ndarray):      m x ceil(n/64) uint64 words, bit set =
+                                BURNING
+    '''
+
+    forest = np.asarray(forest)
+    m, n = forest.shape
+    width = -(-n // WORD) * WORD
+
+    def plane(mask):
+        bits = np.zeros((m, width), dtype=bool)
+        bits[:, :n] = mask
+        return np.packbits(bits, axis=1, bitorder='little').view('<u8') \
+            .astype(np.uint64)
+
+    return plane(forest == TREE), plane(forest == BURNING)
+
+
+def unpackForest(tree, burning, n):
+    '''Inverse of packForest: return the m x n uint8 forest.'''
+
+    def plane(words):
+        return np.unpackbits(np.ascontiguousarray(words, dtype='<u8')
+            .view(np.uint8), axis=1, bitorder='little')[:, :n]
+
+    return plane(tree) + BURNING * plane(burning)
+
+
+def popcount(words):
+    '''Total number of set bits in an array of uint64 words'''
+
+    if hasattr(np, 'bitwise_count'):
+        return int(np.bitwise_count(words).sum(dtype=np.int64))
+
+    return int(np.unpackbits(np.ascontiguousarray(words).view(np.uint8))
+        .sum(dtype=np.int64))
+
+
+def randomBits(rng, prob, count, bits=16):
+    '''Draw 'count' uint64 words whose bits are each set independently with
+    probability prob, rounded to a multiple of 2**-bits.
+
+    Works through the binary expansion 0.b1 b2 ... of prob from its last
+    digit up: starting from 0, each digit ORs (b = 1) or ANDs (b = 0) in a
+    word of fair random bits, which maps probability q to (1 + q)/2 or q/2.
+    Costs at most 'bits' raw draws per word, instead of one float per bit.
+
+    Args:
+        rng (Generator):        Source of the random words
+        prob (float):           Probability of each bit being set
+        count (int):            Number of words
+        bits (int):             Binary digits of prob used
+
+    Returns:
+        words (ndarray):        'count' uint64 words
+    '''
+
+    level = int(round(min(max(prob, 0.0), 1.0) * (1 << bits)))
+
+    if level == 0:
+        return np.zeros(count, dtype=np.uint64)
+    if level == 1 << bits:
+        return np.full(count, ~np.uint64(0), dtype=np.uint64)
+
+    # Trailing zero digits would only AND into an all-zero word
+    while level % 2 == 0:
+        level //= 2
+        bits -= 1
+
+    words = np.zeros(count, dtype=np.uint64)
+    for i in range(bits):
+        draw = rng.bit_generator.random_raw(count)
+        if (level >> i) & 1:
+            np.bitwise_or(words, draw, out=words)
+        else:
+            np.bitwise_and(words, draw, out=words)
+
+    return words
+
+
+class PackedFireStepper:
+    '''Advances a 2-D forest stored as two bit-planes of uint64 words ("is
+    tree" and "is burning"), 64 cells per word and 2 bits per cell in all.
+
+    A step works on whole words: the BURNING plane is shifted one row up and
+    down and one bit left and right (carrying bits across word boundaries)
+    and ORed into the exposed mask, which is ANDed with the TREE plane and a
+    random mask whose bits are set with probability burnProb (see
+    randomBits; only words holding exposed trees are drawn for).  Ignited
+    trees then leave the TREE plane and replace the BURNING plane, so the
+    old fire goes out.  Same rules and boundaries as FireStepper.
+    '''
+
+    BOUNDARIES = FireStepper.BOUNDARIES
+
+    def __init__(self, forest, burnProb, seed=None, boundary='periodic',
+            bits=16):
+        '''Constructor/initializer for PackedFireStepper.
+
+        Args:
+            forest (matrix/tuple):  Initial m x n forest, or its planes as a
+                                    (tree, burning, n) tuple (see
+                                    packForest), which are used in place
+            burnProb (float):       Probability that a tree next to a fire
+                                    catches fire in one step
+            seed (int/Generator):   Seed or Generator for the random draws
+            boundary (str):         'periodic' or 'fixed'
+            bits (int):             Binary digits of burnProb honoured
+
+        Raises:
+            ValueError:             Unknown boundary, or burnProb is an
+                                    array
+        '''
+
+        if boundary not in self.BOUNDARIES:
+            raise ValueError("boundary must be one of %s, not %r" %
+                (self.BOUNDARIES, boundary))
+        if np.ndim(burnProb):
+            raise ValueError("PackedFireStepper needs a single burnProb; "
+                "use FireStepper or FrontierFireStepper for rasters")
+
+        if isinstance(forest, tuple):
+            self.tree, self.burning, self.n = forest
+        else:
+            self.tree, self.burning = packForest(forest)
+            self.n = np.shape(forest)[1]
+
+        self.rng = np.random.default_rng(seed)
+        self.burnProb = burnProb
+        self.boundary = boundary
+        self.bits = bits
+        self.steps = 0
+
+        # Scratch, reused every step
+        self.exposed = np.empty_like(self.burning)
+        self.shifted = np.empty_like(self.burning)
+
+        # Word and bit of the last column, for the periodic east/west wrap
+        self.lastWord, self.lastBit = divmod(self.n - 1, WORD)
+
+
+    @property
+    def lattice(self):
+        '''Current state, unpacked to an m x n uint8 forest (a copy)'''
+
+        return unpackForest(self.tree, self.burning, self.n)
+
+
+    def extinct(self):
+        '''True once no site is BURNING'''
+
+        return not self.burning.any()
+
+
+    def counts(self):
+        '''Number of TREE and BURNING sites'''
+
+        return popcount(self.tree), popcount(self.burning)
+
+
+    def exposure(self):
+        '''Fill self.exposed with the sites that have a BURNING von Neumann
+        neighbour and return it.'''
+
+        burning, exposed, shifted = self.burning, self.exposed, self.shifted
+        one = np.uint64(1)
+        top = np.uint64(WORD - 1)
+        periodic = self.boundary == 'periodic'
+
+        # North and south neighbours: whole rows
+        exposed[0] = burning[-1] if periodic else 0
+        exposed[1:] = burning[:-1]
+        np.bitwise_or(exposed[:-1], burning[1:], out=exposed[:-1])
+        if periodic:
+            np.bitwise_or(exposed[-1], burning[0], out=exposed[-1])
+
+        # East neighbour (column c + 1): shift right, carry in the next
+        # word's lowest bit as the highest bit
+        np.right_shift(burning, one, out=shifted)
+        np.bitwise_or(shifted[:, :-1], burning[:, 1:] << top,
+            out=shifted[:, :-1])
+        np.bitwise_or(exposed, shifted, out=exposed)
+
+        # West neighbour (column c - 1): shift left, carry in the previous
+        # word's highest bit as the lowest bit
+        np.left_shift(burning, one, out=shifted)
+        np.bitwise_or(shifted[:, 1:], burning[:, :-1] >> top,
+            out=shifted[:, 1:])
+        np.bitwise_or(exposed, shifted, out=exposed)
+
+        if periodic:
+            lastWord, lastBit = self.lastWord, np.uint64(self.lastBit)
+            exposed[:, 0] |= (burning[:, lastWord] >> lastBit) & one
+            exposed[:, lastWord] |= (burning[:, 0] & one) << lastBit
+
+        return exposed
+
+
+    def step(self, steps=1):
+        '''Advance the forest 'steps' steps.
+
+        Returns:
+            planes (tuple):     (tree, burning) planes, updated in place
+        '''
+
+        for i in range(steps):
+            exposed = self.exposure()
+
+            # Exposed trees (the mask also covers bits past the last
+            # column, which hold no trees)
+            np.bitwise_and(exposed, self.tree, out=exposed)
+
+            flat = exposed.reshape(-1)
+            words = np.flatnonzero(flat)
+            flat[words] &= randomBits(self.rng, self.burnProb, len(words),
+                self.bits)
+
+            # Ignited trees stop being trees; the old fire burns out
+            np.bitwise_and(self.tree, ~exposed, out=self.tree)
+            np.copyto(self.burning, exposed)
+
+            self.steps += 1
+
+        return self.tree, self.burning
+
+
+# Number of site states (EMPTY, TREE, BURNING)
+STATES = 3
+
+# Resolution of compiled rule probabilities: multiples of 2**-RULE_BITS
+RULE_BITS = 15
+
+NEIGHBOURHOODS = {
+    'vonNeumann': VON_NEUMANN,
+    'moore': diffusionEngine.MOORE_2D,
+}
+
+
+def fireRule(burnProb, probGrow=0.0, probLightning=0.0):
+    '''Return the fire rule as a function for compileRule, optionally with
+    regrowth and lightning.
+
+    The rule: EMPTY becomes TREE with probability probGrow (else stays
+    EMPTY); BURNING becomes EMPTY; a TREE catches fire with probability
+    burnProb if a neighbour is BURNING, and is struck by lightning (the
+    probBurning of initForest, applied every step) with probability
+    probLightning.  With probGrow = probLightning = 0 this is spread().
+
+    Returns:
+        rule (function):    rule(site, neighbours) -> probabilities of the
+                            next state being EMPTY, TREE, BURNING
+    '''
+
+    def rule(site, neighbours):
+        if site == EMPTY:
+            return (1.0 - probGrow, probGrow, 0.0)
+
+        if site == BURNING:
+            return (1.0, 0.0, 0.0)
+
+        catch = burnProb if BURNING in neighbours else 0.0
+        catch = catch + (1.0 - catch) * probLightning
+
+        return (0.0, 1.0 - catch, catch)
+
+    return rule
+
+
+def compileRule(rule, neighbourhood='vonNeumann'):
+    '''Tabulate a stochastic rule over every neighbourhood configuration.
+
+    A configuration (site, n1, ..., nk) is numbered by its base-3 digits,
+    site first: index = (((site*3 + n1)*3 + n2)*3 + ...) + nk.  For each
+    index the table holds the cumulative probabilities of the next state,
+    in units of 2**-RULE_BITS, so the next state is the number of
+    thresholds a random RULE_BITS-bit integer reaches.
+
+    Args:
+        rule (function):        rule(site, neighbours) -> STATES
+                                probabilities summing to 1; neighbours are
+                                in the order of NEIGHBOURHOODS
+        neighbourhood (str):    'vonNeumann' (4 neighbours, 243
+                                configurations) or 'moore' (8, 19683)
+
+    Returns:
+        thresholds (ndarray):   (3**(k+1), STATES - 1) uint16 cumulative
+                                probabilities, scaled by 2**RULE_BITS
+
+    Raises:
+        ValueError:             Unknown neighbourhood, or probabilities
+                                that do not sum to 1
+    '''
+
+    if neighbourhood not in NEIGHBOURHOODS:
+        raise ValueError("neighbourhood must be one of %s, not %r" %
+            (tuple(NEIGHBOURHOODS), neighbourhood))
+
+    k = len(NEIGHBOURHOODS[neighbourhood])
+    configs = np.indices((STATES,) * (k + 1)).reshape(k + 1, -1).T
+
+    probs = np.array([rule(int(config[0]), tuple(int(c) for c in config[1:]))
+        for config in configs], dtype='d')
+
+    if not np.allclose(probs.sum(axis=1), 1.0):
+        raise ValueError("rule probabilities must sum to 1")
+
+    levels = np.rint(np.cumsum(probs, axis=1)[:, :-1] * (1 << RULE_BITS))
+
+    return np.clip(levels, 0, 1 << RULE_BITS).astype(np.uint16)
+
+
+class RuleFireStepper:
+    '''Advances a forest under any rule compiled by compileRule.
+
+    Each step computes every cell's configuration index from shifted views
+    of the padded buffer (one multiply-add per neighbour), gathers both of
+    its thresholds from the table at once (as one uint32), and compares
+    them with one random RULE_BITS-bit integer per cell; the next state is
+    the number of thresholds the draw reaches.  So regrowth or lightning
+    cost nothing extra; on a 4096 x 4096 forest a step takes about 1.1
+    times as long as FireStepper's with the von Neumann neighbourhood and
+    1.5 times with the Moore one.  Probabilities are honoured to
+    2**-RULE_BITS.  Buffers and boundaries are as in FireStepper.
+    '''
+
+    BOUNDARIES = FireStepper.BOUNDARIES
+
+    def __init__(self, forest, burnProb, seed=None, boundary='periodic',
+            rule=None, neighbourhood='vonNeumann'):
+        '''Constructor/initializer for RuleFireStepper.
+
+        Args:
+            forest (matrix):        Initial forest, (..., m, n)
+            burnProb (float):       burnProb of the default rule
+            seed (int/Generator):   Seed or Generator for the random draws
+            boundary (str):         'periodic' or 'fixed'
+            rule (function/array):  Rule function, or thresholds from
+                                    compileRule (default: fireRule(burnProb))
+            neighbourhood (str):    'vonNeumann' or 'moore'
+
+        Raises:
+            ValueError:             Unknown boundary or neighbourhood, or
+                                    burnProb is an array
+        '''
+
+        if boundary not in self.BOUNDARIES:
+            raise ValueError("boundary must be one of %s, not %r" %
+                (self.BOUNDARIES, boundary))
+        if np.ndim(burnProb):
+            raise ValueError("RuleFireStepper needs a single burnProb; "
+                "use FireStepper or FrontierFireStepper for rasters")
+
+        if rule is None:
+            rule = fireRule(burnProb)
+        if callable(rule):
+            rule = compileRule(rule, neighbourhood)
+
+        offsets = NEIGHBOURHOODS[neighbourhood]
+        if len(rule) != STATES ** (len(offsets) + 1):
+            raise ValueError("rule table does not fit the %s neighbourhood"
+                % neighbourhood)
+
+        forest = np.asarray(forest)
+        shape = forest.shape
+        padded = shape[:-2] + (shape[-2] + 2, shape[-1] + 2)
+
+        # Both thresholds of a configuration side by side, gathered as one
+        # uint32 and viewed as two uint16 again
+        self.table = np.ascontiguousarray(rule, dtype=np.uint16) \
+            .view(np.uint32).reshape(-1)
+
+        self.rng = np.random.default_rng(seed)
+        self.boundary = boundary
+        self.steps = 0
+
+        self.buffers = [np.full(padded, EMPTY, dtype=np.uint8)
+            for i in range(2)]
+        self.patches = [diffusionEngine.stencilPatches(buf, offsets)
+            for buf in self.buffers]
+        self.interiors = [patches[0] for patches in self.patches]
+
+        # Scratch, reused every step.  The configuration index is built in
+        # the narrowest type that holds it (uint8 for the 243 von Neumann
+        # configurations) and widened into an intp buffer for the gather,
+        # which np.take would otherwise allocate every step.
+        self.size = int(np.prod(shape))
+        self.index = np.empty(shape, dtype=np.uint8 if len(rule) <= 256
+            else np.uint16)
+        self.wide = np.empty(shape, dtype=np.intp)
+        self.gathered = np.empty(shape, dtype=np.uint32)
+        pair = self.gathered.view(np.uint16).reshape(shape + (2,))
+        self.lower, self.upper = pair[..., 0], pair[..., 1]
+        self.draws = np.empty(shape, dtype=np.uint16)
+        self.above = np.empty(shape, dtype=bool)
+
+        self.current = 0
+        self.interiors[0][...] = forest
+
+
+    @property
+    def lattice(self):
+        '''Interior (m x n view) of the current state'''
+
+        return self.interiors[self.current]
+
+
+    def extinct(self):
+        '''True if no site is BURNING now (with regrowth and lightning the
+        fire may still start again)'''
+
+        return not np.any(self.lattice == BURNING)
+
+
+    def step(self, steps=1):
+        '''Advance the forest 'steps' steps.
+
+        Returns:
+            lattice (matrix):   View of the new current state.  It is
+                                overwritten two steps later; copy it to
+                                keep it.
+        '''
+
+        index = self.index
+        above = self.above
+
+        for i in range(steps):
+            src = self.current
+            dst = 1 - src
+
+            diffusionEngine.refreshGhosts(self.buffers[src], self.boundary)
+            patches = self.patches[src]
+
+            # Base-3 configuration index, site first
+            np.copyto(index, patches[0])
+            for neighbour in patches[1:]:
+                np.multiply(index, STATES, out=index)
+                np.add(index, neighbour, out=index)
+
+            # Indices are always in range; 'clip' takes numpy's fast path
+            np.copyto(self.wide, index)
+            np.take(self.table, self.wide, out=self.gathered, mode='clip')
+
+            # Four RULE_BITS-bit draws per raw 64-bit word (random_raw has
+            # no out=, so its words are the one array made per step)
+            raw = self.rng.bit_generator.random_raw(-(-self.size // 4))
+            np.right_shift(raw.view(np.uint16)[:self.size].reshape(
+                self.draws.shape), 16 - RULE_BITS, out=self.draws)
+
+            # Next state = number of cumulative thresholds reached, counted
+            # straight into the destination (0/1, then + 0/1)
+            target = self.interiors[dst]
+            np.greater_equal(self.draws, self.lower, out=target.view(bool))
+            np.greater_equal(self.draws, self.upper, out=above)
+            np.add(target, above.view(np.uint8), out=target)
+
+            self.current = dst
+            self.steps += 1
+
+        return self.lattice
+
+
+# Engine registry: name -> stepper class, for runToExtinction and drivers
+ENGINES = {
+    'array': FireStepper,
+    'frontier': FrontierFireStepper,
+    'packed': PackedFireStepper,
+    'rule': RuleFireStepper,
+}
+
+
+def runToExtinction(forest, burnProb, seed=None, boundary='periodic',
+        engine='frontier', maxSteps=None, wind=None):
+    '''Run the fire until no site is BURNING, checking for extinction
+    after every step.  The check is cheap for every engine: the length of
+    the front, the last ignition mask or the packed BURNING plane.
+
+    Args:
+        forest (matrix):        Initial m x n forest
+        burnProb (float/array): Probability that a tree next to a fire
+                                catches fire in one step; an m x n raster
+                                needs the 'frontier' or 'array' engine
+        seed (int/Generator):   Seed or Generator for the random draws
+        boundary (str):         'periodic' or 'fixed'
+        engine (str):           Name of the stepper in ENGINES
+        maxSteps (int):         Give up after this many steps
+        wind (list):            Optional wind factors (see windFactors),
+                                for the 'frontier' and 'array' engines
+
+    Returns:
+        forest (ndarray):       Final m x n forest
+        steps (int):            Steps taken
+    '''
+
+    if wind is None:
+        stepper = ENGINES[engine](forest, burnProb, seed, boundary)
+    else:
+        stepper = ENGINES[engine](forest, burnProb, seed, boundary,
+            wind=wind)
+
+    while not stepper.extinct() and \
+            (maxSteps is None or stepper.steps < maxSteps):
+        stepper.step()
+
+    return np.array(stepper.lattice), stepper.steps
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+
+# fireParallel.py
+#
+# Author: Martin Metke
+# Date: 2026/10/19
+# For: CSS458A Week 6 Problem2 (performance)
+#
+# Multi-process Monte Carlo driver for the fire cellular automaton.
+#
+# Every (burnProb, run) pair of a sweep is one job with its own numpy
+# Generator, spawned from a single np.random.SeedSequence in job order.  A
+# job's random numbers therefore depend only on the sweep's seed and the
+# job's position, never on which worker runs it or with what, so a sweep
+# gives identical results for any number of workers.  Jobs are handed to a
+# process pool in blocks of runs (so tiny forests are not swamped by
+# inter-process overhead) and the results are merged back in job order.
+
+#============================= IMPORTS =======================================
+import multiprocessing as mp
+import os
+from statistics import NormalDist
+
+import numpy as np
+
+import fireEngine
+#============================= END IMPORTS ===================================
+
+
+def _runBlock(job):
+    '''Body of one pool task: run a block of fires at one burn probability.
+
+    Args:
+        job (tuple):        (n, burnProb, seeds, t, probTree, engine,
+                            boundary), seeds being one SeedSequence per run
+
+    Returns:
+        burned (ndarray):   Final burned fraction of each run
+    '''
+
+    n, burnProb, seeds, t, probTree, engine, boundary = job
+    burned = np.empty(len(seeds))
+
+    for k, seed in enumerate(seeds):
+        rng = np.random.default_rng(seed)
+        forest = fireEngine.initForestArray(n, probTree, seed=rng)
+
+        if t is None:
+            final = fireEngine.runToExtinction(forest, burnProb, rng,
+                boundary, engine)[0]
+        else:
+            stepper = fireEngine.ENGINES[engine](forest, burnProb, rng,
+                boundary)
+            stepper.step(t)
+            final = stepper.lattice
+
+        burned[k] = fireEngine.burnedFraction(final)
+
+    return burned
+
+
+def parallelSweep(n, burnProbs, runs, t=None, seed=0, workers=None,
+        probTree=1.0, engine='array', boundary='periodic', confidence=0.95,
+        block=None):
+    '''Run 'runs' fires at each burn probability over a process pool and
+    report the mean burned fraction with a confidence interval.
+
+    Args:
+        n (int):                Side of the forest
+        burnProbs (list):       P burn probabilities to evaluate
+        runs (int):             R runs per probability
+        t (int):                Steps per run (default: until the fire is
+                                out)
+        seed (int):             Seed of the whole sweep
+        workers (int):          Worker processes (default: CPU count); 1
+                                runs in this process
+        probTree (float):       Tree density of the initial forests
+        engine (str):           Stepper in fireEngine.ENGINES
+        boundary (str):         'periodic' or 'fixed'
+        confidence (float):     Confidence level of the interval
+        block (int):            Runs per pool task (default: enough for
+                                about four tasks per worker)
+
+    Returns:
+        stats (dict):           'burnProbs' (P,), 'burned' (P, R) every
+                                run's burned fraction, 'mean', 'std',
+                                'lower', 'upper' (P,) mean, sample standard
+                                deviation and normal-approximation
+                                confidence interval of the mean
+    '''
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    burnProbs = np.asarray(burnProbs, dtype='d')
+    numProbs = len(burnProbs)
+
+    # One child seed per (probability, run), in job order
+    seeds = np.random.SeedSequence(seed).spawn(numProbs * runs)
+
+    if block is None:
+        block = max(1, -(-numProbs * runs // (4 * workers)))
+
+    jobs = []
+    for i, burnProb in enumerate(burnProbs):
+        for first in range(0, runs, block):
+            last = min(first + block, runs)
+            jobs.append((n, burnProb, seeds[i * runs + first:i * runs + last],
+                t, probTree, engine, boundary))
+
+    if workers == 1:
+        results = [_runBlock(job) for job in jobs]
+    else:
+        with mp.Pool(workers) as pool:
+            results = pool.map(_runBlock, jobs)
+
+    burned = np.concatenate(results).reshape(numProbs, runs)
+
+    mean = burned.mean(axis=1)
+    std = burned.std(axis=1, ddof=1) if runs > 1 else np.zeros(numProbs)
+    half = NormalDist().inv_cdf(0.5 + confidence / 2) * std / np.sqrt(runs)
+
+    return {"burnProbs": burnProbs,
+            "burned": burned,
+            "mean": mean,
+            "std": std,
+            "lower": mean - half,
+            "upper": mean + half}
@@ -18,6 +18,11 @@ import matplotlib.animation as animation
 from matplotlib import pyplot as plt
 from matplotlib.ticker import MaxNLocator
 import time
+
+import diffusionEngine
+import diffusionFrames
+import diffusionParallel
+import diffusionSolvers
 #============================= END IMPORTS ===================================
 
 
@@ -42,7 +47,7 @@ def diffusionSto(diffusionRate, site, N, NE, E, SE, S, SW, W, NW):
     the random number range so that it sums to 0.0"""
 
     # Convert neighbor values to an ndarray for element-wise operations
-    neighVals = np.array([N, NE, E, SE, S, SW, W, NW], dtype='f')
+    neighVals = np.array([N, NE, E, SE, S, SW, W, NW], dtype='d')
         
     # Generate random normal distribution, then create coeffecients of form
     # "(1 + rndi)*r".
@@ -54,7 +59,16 @@ def diffusionSto(diffusionRate, site, N, NE, E, SE, S, SW, W, NW):
     # then add stochasticly modified neighboring sites' values.
     return(1-np.sum(coeffs))*site + np.sum(coeffs*neighVals)
 
-def initBar(m, n, hotSites, coldSites):
+# diffusionSto draws random numbers per call, so it cannot be lifted to whole
+# arrays automatically; point the array engine at its lattice-wide equivalent,
+# a StochasticDiffusion whose noise buffer is reused every step.  diffusion
+# would lift as-is, but registering it lets the stepper use its
+# allocation-free stencil.
+diffusionEngine.registerArrayFunc(diffusion, diffusionEngine.arrayDiffusion)
+diffusionEngine.registerArrayFunc(diffusionSto,
+        diffusionEngine.StochasticDiffusion())
+
+def initBar(m, n, hotSites, coldSites, dtype = 'd'):
     """ Set up the m x n grid of temperatures.  Cells with coords in 'hotSites'
     have the global value HOT; cells with coordinates in coldSites have the
     global value COLD; all other cells have the value AMBIENT.
@@ -63,6 +77,8 @@ def initBar(m, n, hotSites, coldSites):
         m, n (positive int):    length and height of grid
         hotSites (list):        List of coordinates of "HOT" cells
         coldSites (list):       List of coordinates of "COLD" cells
+        dtype (dtype):          Precision of the grid, 'f' (float32) or
+                                'd' (float64)
                 
     Returns:
         bar (matrix):           m x n matrix of temperatures
@@ -70,7 +86,7 @@ def initBar(m, n, hotSites, coldSites):
     """
 
     # Initialize grid of m x n
-    ambientBar = np.zeros((m, n), dtype='l')
+    ambientBar = np.zeros((m, n), dtype=diffusionEngine.checkPrecision(dtype))
     ambientBar.fill(AMBIENT)
     return applyHotCold(ambientBar, hotSites, coldSites)
 
@@ -98,6 +114,26 @@ def applyHotCold(bar, hotSites, coldSites):
 
     return newBar
 
+def compileHotCold(m, n, hotSites, coldSites):
+    """ Compile hot and cold site lists once, so that re-imposing them every
+    step is a single in-place assignment instead of a loop over coordinates.
+
+    Args:
+        m, n (positive int):    length and height of grid
+        hotSites (list):        List of coordinates of "HOT" cells
+        coldSites (list):       List of coordinates of "COLD" cells
+
+    Returns:
+        sites (DirichletSites): Callable that pins the sites on a lattice
+
+    """
+
+    sites = diffusionEngine.DirichletSites((m, n))
+    sites.add(hotSites, HOT)
+    sites.add(coldSites, COLD)
+
+    return sites
+
 def reflectingLat(lat):
     """Function to accept a grid and to return a grid extended one cell in each
     direction with the reflecting boundary conditions.
@@ -153,25 +189,264 @@ def applyDiffusionExtended(latExt, diffusionRate, diffFunc):
     # Return the internal lattice only (no boundaries)                    
     return intLat[1:-1, 1:-1]
 
-def diffusionSim(m, n, diffusionRate, t, diffFunc = diffusion):
-    """Function to return a list of grids in a simulation of the diffusion of
-    heat through a metal bar"""
+def barSites(m, n):
+    """Function to return the hot and cold site coordinates used for an
+    m x n metal bar.
+
+    Returns:
+        hotSites (list):        List of coordinates of "HOT" cells
+        coldSites (list):       List of coordinates of "COLD" cells
+    """
 
     coldSites = [[m-1, n/3], [m-1, (n/3)+1], [m-1, (n/3)+2], [m-1, (n/3)+3],
             [m-1, (n/3)+4]]
     
     hotSites = [[m/4, 0], [(m/4)+1, 0], [(m/4)+2, 0], [0, n*(3/4)]]
+
+    return hotSites, coldSites
+
+def diffusionSim(m, n, diffusionRate, t, diffFunc = diffusion, vectorize = True,
+        recorder = None, method = 'explicit', dt = 1, tol = None,
+        checkEvery = 10, dtype = 'd'):
+    """Function to return a list of grids in a simulation of the diffusion of
+    heat through a metal bar.
+
+    What is returned is decided by recorder (a diffusionEngine.FrameRecorder
+    or subclass); the default records every full grid.  Use e.g.
+    FrameRecorder(every=k), MemmapRecorder(path) or ProbeRecorder(cells) to
+    keep less.
+
+    If vectorize is True and diffFunc can be applied to whole arrays (see
+    diffusionEngine.liftDiffFunc), a diffusionEngine.DiffusionStepper
+    updates the lattice in place with reflecting boundaries; otherwise
+    reflectingLat and applyDiffusionExtended visit each cell.
+
+    method = 'adi' instead solves the default diffusion function implicitly
+    with diffusionSolvers.ADIStepper, each of the t steps advancing dt
+    explicit steps at once; this stays stable and accurate past the explicit
+    limit of 1/8, up to diffusionRate*dt of 1.  method = 'implicit' uses the
+    backward Euler diffusionSolvers.ImplicitStepper, which takes any dt
+    without overshooting.
+
+    If tol is given, the run stops early once the largest change of any cell
+    over one step falls below tol.  The change is only measured every
+    checkEvery steps, so the check costs next to nothing; the returned
+    history then ends at the step where the run stopped.
+
+    dtype sets the precision, 'f' (float32) or 'd' (float64), of the grid,
+    the stepping, the stochastic noise and (unless the recorder says
+    otherwise) the history.  float64 is the reference; see comparePrecision.
+    """
+
+    if method not in ('explicit', 'adi', 'implicit'):
+        raise ValueError("method must be 'explicit', 'adi' or 'implicit', "
+                "not %r" % (method,))
+    if method != 'explicit' and diffFunc is not diffusion:
+        raise ValueError("method %r only solves the default diffusion" %
+                (method,))
+
+    hotSites, coldSites = barSites(m, n)
     
+    bar = initBar(m, n, hotSites, coldSites, dtype)
+    sites = compileHotCold(m, n, hotSites, coldSites)
+
+    if recorder is None:
+        recorder = diffusionEngine.FrameRecorder()
+    recorder.start(bar, t)
+    recorder.record(0, bar)
+
+    if method == 'adi':
+        stepper = diffusionSolvers.ADIStepper(bar, diffusionRate, dt, sites,
+                dtype)
+    elif method == 'implicit':
+        stepper = diffusionSolvers.ImplicitStepper(bar, diffusionRate, dt,
+                sites, dtype)
+    elif vectorize and diffusionEngine.liftDiffFunc(diffFunc) is not None:
+        stepper = diffusionEngine.DiffusionStepper(bar, diffusionRate,
+                diffFunc, 'reflecting', pins=sites)
+    else:
+        stepper = None
+
+    if tol is not None:
+        previous = np.empty(np.shape(bar), dtype=bar.dtype)
+
+    for step in range(t):
+        checking = tol is not None and (step + 1) % checkEvery == 0
+        if checking:
+            np.copyto(previous, bar)
+
+        if stepper is None:
+            barExtended = reflectingLat(bar)
+            bar = applyDiffusionExtended( barExtended, diffusionRate,diffFunc)
+            bar = sites(bar)
+        else:
+            bar = stepper.step()
+        recorder.record(step + 1, bar)
+
+        if checking and np.max(np.abs(bar - previous)) < tol:
+            recorder.truncate(step + 1)
+            break
+
+    return recorder.result()
+
+def comparePrecision(m, n, diffusionRate, t, method = 'explicit', dt = 1,
+        tol = 1e-2):
+    """Function to validate float32 runs against the float64 reference: runs
+    the (deterministic) simulation in both precisions and checks that no
+    temperature of the float32 history is more than tol degrees off.  (On
+    the 100 x 280 bar at rate 0.1 the largest difference is about 1e-3
+    after 2000 explicit steps.)
+
+    Args:
+        tol (float):            Largest |float32 - float64| accepted, in
+                                degrees C
+
+    Returns:
+        maxDiff (float):        Largest |float32 - float64| of any cell/step
+
+    Raises:
+        AssertionError:         maxDiff is above tol
+    """
+
+    single = diffusionSim(m, n, diffusionRate, t, method = method, dt = dt,
+            dtype = 'f')
+    double = diffusionSim(m, n, diffusionRate, t, method = method, dt = dt,
+            dtype = 'd')
+
+    maxDiff = float(np.max(np.abs(single.astype('d') - double)))
+
+    if maxDiff > tol:
+        raise AssertionError("float32 run is %g degrees off float64, more "
+                "than tol = %g" % (maxDiff, tol))
+
+    return maxDiff
+
+def diffusionSteady(m, n, tol = 1e-8):
+    """Function to return the equilibrium temperatures of the metal bar, solved
+    for directly (diffusionSolvers.steadyState) instead of by running the
+    simulation until it stops changing.
+
+    Args:
+        m, n (positive int):    length and height of grid
+        tol (float):            Largest change one explicit step at rate 1
+                                may still make to any cell
+
+    Returns:
+        bar (matrix):           m x n matrix of equilibrium temperatures
+    """
+
+    hotSites, coldSites = barSites(m, n)
+
     bar = initBar(m, n, hotSites, coldSites)
-    grids = np.array([bar], dtype='l')
+    sites = compileHotCold(m, n, hotSites, coldSites)
+
+    return diffusionSolvers.steadyState(bar, sites, tol)[0]
+
+def diffusionEnsemble(m, n, diffusionRate, t, runs, cells,
+        diffFunc = diffusionSto, percentiles = (5, 50, 95), dtype = 'd',
+        seed = None):
+    """Function to run 'runs' independent simulations of the metal bar at once
+    and return per-step statistics of the temperatures of 'cells'.
+
+    All runs are advanced together as one (runs, m, n) array by a single
+    diffusionEngine.DiffusionStepper, each drawing its own noise.  Only the
+    mean, variance and percentiles of the tracked cells are kept, so the
+    Python overhead and memory do not grow with the number of runs.
+
+    diffusionSto is run as a diffusionEngine.StochasticDiffusion seeded with
+    seed, which draws the noise of all runs into one reused buffer, so the
+    same seed gives the same statistics.
+
+    Args:
+        m, n (positive int):    length and height of grid
+        diffusionRate (float):  Rate of diffusion
+        t (int):                Number of time steps
+        runs (int):             Number of independent runs (replicates)
+        cells (list):           List of [row, col] cells to track
+        diffFunc (function):    Diffusion function; must be vectorizable
+        percentiles (list):     Percentiles (0-100) to report per step
+        dtype (dtype):          Precision, 'f' (float32) or 'd' (float64)
+        seed (int):             Seed (or SeedSequence/Generator) for
+                                diffusionSto's noise; None for fresh entropy
+
+    Returns:
+        stats (dict):           See diffusionEngine.EnsembleProbeStats.result
+    """
+
+    hotSites, coldSites = barSites(m, n)
+
+    bar = initBar(m, n, hotSites, coldSites, dtype)
+    sites = compileHotCold(m, n, hotSites, coldSites)
+
+    if diffFunc is diffusionSto:
+        diffFunc = diffusionEngine.StochasticDiffusion(seed)
+
+    stepper = diffusionEngine.DiffusionStepper(
+            np.broadcast_to(bar, (runs, m, n)), diffusionRate, diffFunc,
+            'reflecting', pins=sites)
+
+    stats = diffusionEngine.EnsembleProbeStats(cells, percentiles)
+    stats.start(stepper.lattice, t)
+    stats.record(0, stepper.lattice)
 
     for step in range(t):
-        barExtended = reflectingLat(bar)
-        bar = applyDiffusionExtended( barExtended, diffusionRate,diffFunc)
-        bar = applyHotCold(bar, hotSites, coldSites)
-        grids = np.append(grids, np.array([bar]), axis=0)
+        stats.record(step + 1, stepper.step())
 
-    return grids
+    return stats.result()
+
+def diffusionBlock(l, m, n, diffusionRate, t, stencil = 'vonNeumann',
+        recorder = None, workers = 1, dtype = 'd'):
+    """Function to simulate the diffusion of heat through a metal block l
+    cells thick, whose every layer carries the bar's hot and cold sites
+    (i.e. the sites run through the full thickness).
+
+    Args:
+        l, m, n (positive int): thickness, length and height of the block
+        diffusionRate (float):  Rate of diffusion
+        t (int):                Number of time steps
+        stencil (str):          'vonNeumann' (6 neighbours) or 'moore' (26)
+        recorder (recorder):    Optional diffusionEngine recorder (e.g. a
+                                ProbeRecorder of [layer, row, col] cells);
+                                only used when workers == 1
+        workers (int):          Processes to split the layers over; more than
+                                one runs diffusionParallel.parallelDiffuse
+        dtype (dtype):          Precision, 'f' (float32) or 'd' (float64)
+
+    Returns:
+        block (matrix):         l x m x n matrix after t steps, or the
+                                recorder's result if one was given
+    """
+
+    hotSites, coldSites = barSites(m, n)
+
+    bar = initBar(m, n, hotSites, coldSites, dtype)
+    block = np.array(np.broadcast_to(bar, (l, m, n)))
+
+    # Extrude the bar's sites through every layer
+    layers = diffusionEngine.DirichletSites((l, m, n))
+    sites = compileHotCold(m, n, hotSites, coldSites)
+    layers.addMask(np.broadcast_to(sites.mask, (l, m, n)),
+            np.broadcast_to(sites.temps, (l, m, n)))
+
+    if workers > 1:
+        return diffusionParallel.parallelDiffuse(block, diffusionRate, t,
+                workers, 'reflecting', sites = layers, dtype = dtype,
+                stencil = stencil)
+
+    stepper = diffusionEngine.DiffusionStepper(block, diffusionRate,
+            diffusion, 'reflecting', pins = layers, ndim = 3,
+            stencil = stencil)
+
+    if recorder is None:
+        return np.array(stepper.step(t))
+
+    recorder.start(stepper.lattice, t)
+    recorder.record(0, stepper.lattice)
+
+    for step in range(t):
+        recorder.record(step + 1, stepper.step())
+
+    return recorder.result()
 
 if __name__ == "__main__":
     """ Run 100 simulations using a stochastic diffusion method, and track the
@@ -193,25 +468,19 @@ if __name__ == "__main__":
     # Cell we wish to keep track of [row, col]:
     cell = [5, 14]
     
-    # Heat states of the cell above, over 100 simulations
-    stoHeats = []
-    
-    # Run simulation 100 times and record the end heat states for cell
-    for i in range(runs):
-
-        # Grab all temperatures across the simulation for desired cell, for
-        # plotting later.
-        stoHeats.append(diffusionSim(10, 28, 0.1, steps, diffusionSto)[:, cell[0], cell[1]])
+    # Run all simulations at once as an ensemble, keeping the per-step mean
+    # and range (0th and 100th percentiles) of the cell's temperature
+    stats = diffusionEnsemble(10, 28, 0.1, steps, runs, [cell], diffusionSto,
+            percentiles=(0, 100))
 
-    sims = np.array(stoHeats)
+    print("Mean end temp for cell, ranges: ", stats["mean"][-1, 0],
+            tuple(stats["percentiles"][-1, :, 0]))
 
-    print("Mean end temp for cell, ranges: ", np.mean(sims[:,-1]), 
-            (np.amin(sims[:,-1]), np.amax(sims[:,-1])))
-
-    means = np.mean(sims, axis=0)
+    means = stats["mean"][:, 0]
 
     # Record a non-stochastic heat simulation for the same cell
-    diffHeats = diffusionSim(10, 28, 0.1, steps)[:, cell[0], cell[1]]
+    diffHeats = diffusionSim(10, 28, 0.1, steps,
+            recorder=diffusionEngine.ProbeRecorder([cell]))[:, 0]
     
     # For plotting, include 0th time step + 1st through 'step'th
     times = np.arange(steps+1)
@@ -228,20 +497,25 @@ if __name__ == "__main__":
     plt.legend()
     plt.show()
 
-    # From Stack Overflow question:
-    # http://stackoverflow.com/questions/17853680/animation-using-matplotlib-with-subplots-and-artistanimation
+    # Animate with one reused image: each frame is mapped to RGB through a
+    # precomputed colormap table and swapped in with set_data.  For long
+    # runs, pass a diffusionFrames recorder (RawVideoRecorder, PNGRecorder,
+    # ImageRecorder) to diffusionSim instead of storing every grid.
     fig = plt.figure()
     ax1 = fig.add_subplot(1,1,1)
-    ims = []
+    rasterizer = diffusionFrames.Rasterizer('jet', COLD, HOT)
 
     output = diffusionSim(10, 28, 0.1, steps, diffusionSto)
 
-    for time in range(output.shape[0]):
-        im = ax1.matshow(output[time], cmap=plt.get_cmap('jet'))
-        ims.append([im,])     
+    im = ax1.imshow(rasterizer.toRGB(output[0]), interpolation='nearest')
+
+    def showFrame(time):
+        im.set_data(rasterizer.toRGB(output[time]))
+        return [im]
 
     #run animation
-    ani = animation.ArtistAnimation(fig,ims, interval=100,blit=True)
+    ani = animation.FuncAnimation(fig, showFrame, frames=output.shape[0],
+            interval=100, blit=True)
     #plt.colorbar()
     plt.show()
 
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+
+# toadBenchmark.py
+#
+# Author: Martin Metke
+# Date: 2026/10/19
+# For: CSS458A Week 7 Problem1 (performance)
+#
+# Benchmark suite for the Cane Toad model in week7_problem1.py.
+#
+# Times three things across field sizes, toad densities and engines:
+#   construct:  building a Field (food, AWPs, borders, toads)
+#   update:     one Field.update() tick
+#   run:        a whole Simulation.run() with plotting/printing turned off
+#
+# Results are emitted as JSON (ticks/sec, seconds per call, peak traced
+# memory).  A stored baseline can be compared against; any case that is
+# slower (or heavier) than the baseline by more than the threshold counts as
+# a regression and the script exits with status 1.
+#
+# Usage examples:
+#   python3 toadBenchmark.py --sizes 42 128 --output current.json
+#   python3 toadBenchmark.py --save-baseline toadBaseline.json
+#   python3 toadBenchmark.py --baseline toadBaseline.json --threshold 0.15
+
+#============================= IMPORTS =======================================
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+import week7_problem1 as toads
+#============================= END IMPORTS ===================================
+
+
+#========================== USER ADJUSTABLE (begin) ==========================
+DEFAULT_SIZES = [42, 128, 512, 1024, 2048, 4096]   # Square field side lengths
+DEFAULT_FRACTIONS = [0.2, 0.8]  # Chance of a toad per east border cell
+DEFAULT_TICKS = 50              # Ticks timed for "update" and "run"
+DEFAULT_REPEATS = 3             # Best-of-N repeats for every timing
+DEFAULT_THRESHOLD = 0.10        # Allowed fractional regression vs baseline
+DEFAULT_SEED = 458              # Seed for np.random before every case
+#=========================== USER ADJUSTABLE (end) ===========================
+
+
+def objectFieldFactory(width, height, toadFraction):
+    '''Build a Field of the object-per-toad engine (one Toad instance per
+    toad, updated in Python loops).'''
+
+    return toads.Field(width, height, toadFraction)
+
+
+def objectSimulationFactory(width, height, toadFraction, ticks):
+    '''Build a quiet Simulation of the object-per-toad engine.'''
+
+    return toads.Simulation(cycles=ticks, plot=False, printout=False,
+            width=width, height=height, toadFraction=toadFraction)
+
+
+# Engine registry: name -> (Field factory, Simulation factory).  Other toad
+# engines register here under their own names to be benchmarked alongside.
+ENGINES = {
+    "object": (objectFieldFactory, objectSimulationFactory),
+}
+
+
+def timeConstruct(engine, size, toadFraction, ticks, seed):
+    '''Time construction of a single Field.
+
+    Returns:
+        elapsed (float):    Seconds taken
+        ticks (int):        Always 0 (no ticks are advanced)
+        toads (int):        Number of toads placed in the field
+    '''
+
+    makeField = ENGINES[engine][0]
+
+    np.random.seed(seed)
+    start = time.perf_counter()
+    field = makeField(size, size, toadFraction)
+    elapsed = time.perf_counter() - start
+
+    return elapsed, 0, len(field.aliveToads)
+
+
+def timeUpdate(engine, size, toadFraction, ticks, seed):
+    '''Time up to 'ticks' calls of Field.update() on a freshly built Field.
+    Construction is not included.  Stops early if every toad has croaked or
+    migrated.
+
+    Returns:
+        elapsed (float):    Seconds spent inside update()
+        ticks (int):        Number of update() calls actually made
+        toads (int):        Number of toads at the start
+    '''
+
+    makeField = ENGINES[engine][0]
+
+    np.random.seed(seed)
+    field = makeField(size, size, toadFraction)
+    numToads = len(field.aliveToads)
+
+    done = 0
+    start = time.perf_counter()
+    while done < ticks and not field.exterminated():
+        field.update()
+        done += 1
+    elapsed = time.perf_counter() - start
+
+    return elapsed, done, numToads
+
+
+def timeRun(engine, size, toadFraction, ticks, seed):
+    '''Time a whole Simulation.run() of at most 'ticks' cycles, including
+    building the Simulation and its Field.
+
+    Returns:
+        elapsed (float):    Seconds taken
+        ticks (int):        Number of cycles actually simulated
+        toads (int):        Number of toads at the start
+    '''
+
+    makeSimulation = ENGINES[engine][1]
+
+    np.random.seed(seed)
+    start = time.perf_counter()
+    sim = makeSimulation(size, size, toadFraction, ticks)
+    numToads = len(sim.field.aliveToads)
+    times, statuses = sim.run()
+    elapsed = time.perf_counter() - start
+
+    return elapsed, len(times) - 1, numToads
+
+
+BENCHMARKS = {
+    "construct": timeConstruct,
+    "update": timeUpdate,
+    "run": timeRun,
+}
+
+
+def measureCase(benchmark, engine, size, toadFraction, ticks, repeats, seed):
+    '''Run one benchmark case: best-of-'repeats' timing, followed by one
+    separate pass under tracemalloc to record peak memory (tracing slows
+    the timed passes down, so it is kept out of them).
+
+    Returns:
+        result (dict):      JSON-ready record for this case
+    '''
+
+    func = BENCHMARKS[benchmark]
+
+    best = None
+    for i in range(repeats):
+        elapsed, done, numToads = func(engine, size, toadFraction, ticks, seed)
+        if best is None or elapsed < best:
+            best = elapsed
+
+    tracemalloc.start()
+    func(engine, size, toadFraction, ticks, seed)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result = {"benchmark": benchmark,
+              "engine": engine,
+              "size": size,
+              "toadFraction": toadFraction,
+              "toads": numToads,
+              "ticks": done,
+              "seconds": best,
+              "peakBytes": peak}
+
+    if benchmark == "construct":
+        result["perSec"] = 1.0 / best if best > 0 else float("inf")
+    else:
+        result["perSec"] = done / best if best > 0 else float("inf")
+
+    return result
+
+
+def runSuite(benchmarks, engines, sizes, fractions, ticks, repeats, seed,
+        log=sys.stderr):
+    '''Run every combination of benchmark, engine, size and toad fraction.
+
+    Returns:
+        report (dict):      {"meta": {...}, "results": [case, ...]}
+    '''
+
+    results = []
+
+    for engine in engines:
+        for size in sizes:
+            for toadFraction in fractions:
+                for benchmark in benchmarks:
+                    if log is not None:
+                        print("%-9s %-8s %5i^2 toads=%.2f" % (benchmark,
+                            engine, size, toadFraction), file=log)
+                    results.append(measureCase(benchmark, engine, size,
+                        toadFraction, ticks, repeats, seed))
+
+    meta = {"python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "ticks": ticks,
+            "repeats": repeats,
+            "seed": seed}
+
+    return {"meta": meta, "results": results}
+
+
+def caseKey(result):
+    '''Key that identifies a case across reports'''
+
+    return (result["benchmark"], result["engine"], result["size"],
+            result["toadFraction"])
+
+
+def compareToBaseline(report, baseline, threshold=DEFAULT_THRESHOLD):
+    '''Compare a report against a baseline report.
+
+    A case regresses if its rate (perSec) dropped by more than 'threshold'
+    or its peak memory grew by more than 'threshold', relative to the
+    baseline's matching case.  Cases missing from the baseline are skipped.
+
+    Returns:
+        regressions (list): List of (key, metric, baseline, current) tuples
+    '''
+
+    old = {caseKey(r): r for r in baseline["results"]}
+    regressions = []
+
+    for result in report["results"]:
+        key = caseKey(result)
+        if key not in old:
+            continue
+
+        if result["perSec"] < old[key]["perSec"] * (1.0 - threshold):
+            regressions.append((key, "perSec", old[key]["perSec"],
+                result["perSec"]))
+
+        if result["peakBytes"] > old[key]["peakBytes"] * (1.0 + threshold):
+            regressions.append((key, "peakBytes", old[key]["peakBytes"],
+                result["peakBytes"]))
+
+    return regressions
+
+
+def main(argv=None):
+    '''Command line entry point.  Returns the process exit status.'''
+
+    parser = argparse.ArgumentParser(description="Cane Toad benchmarks")
+    parser.add_argument("--benchmarks", nargs="+", choices=sorted(BENCHMARKS),
+            default=["construct", "update", "run"])
+    parser.add_argument("--engines", nargs="+", choices=sorted(ENGINES),
+            default=sorted(ENGINES))
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES)
+    parser.add_argument("--fractions", nargs="+", type=float,
+            default=DEFAULT_FRACTIONS)
+    parser.add_argument("--ticks", type=int, default=DEFAULT_TICKS)
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--output", help="Write JSON report to this file")
+    parser.add_argument("--baseline", help="Baseline JSON to compare against")
+    parser.add_argument("--save-baseline", dest="saveBaseline",
+            help="Write the report as a new baseline to this file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    report = runSuite(args.benchmarks, args.engines, args.sizes,
+            args.fractions, args.ticks, args.repeats, args.seed)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.saveBaseline:
+        with open(args.saveBaseline, "w") as f:
+            f.write(text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+        regressions = compareToBaseline(report, baseline, args.threshold)
+
+        for key, metric, before, after in regressions:
+            print("REGRESSION %s %s: %g -> %g" % (key, metric, before, after),
+                    file=sys.stderr)
+
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -106,12 +106,16 @@ WOULD_LIKE_EAT          = 0.9   # Internal water level below which toad eats
 class Simulation:
     '''Class that runs a Cane Toad simulation'''
 
-    def __init__(self, interval=24, cycles=2400, plot=True, printout=True):
+    def __init__(self, interval=24, cycles=2400, plot=True, printout=True,
+            width=42, height=42, toadFraction=INIT_PERCENTAGE_TOADS):
         '''Constructor/initializer for Simulation.
         
         Args:
             interval (numeric):     Time for simulation to run (hours)
             cycles   (numeric):     Number of cycles for simulation to run
+            width, height (int):    Dimensions of the Field, borders included
+            toadFraction (float):   Chance each east border cell starts with
+                                    a Toad
             
         '''
         # Store runtime information
@@ -123,7 +127,7 @@ class Simulation:
         # Calculate dT per cycle based on simulation time interval and cycles
         self.dT = (interval * 3600.0)/cycles
 
-        self.field = Field()
+        self.field = Field(width, height, toadFraction)
         
         if self.plot:
             self.fig = plt.figure()
@@ -186,8 +190,11 @@ class Simulation:
 
 
 class Field:
-    def __init__(self, width=42, height=42 ):
+    def __init__(self, width=42, height=42,
+            toadFraction=INIT_PERCENTAGE_TOADS):
         
+        self.toadFraction = toadFraction
+
         self.croakedToads = []
         self.migratedToads = []
         
@@ -231,7 +238,7 @@ class Field:
         # Can't spawn toads on the top or bottom corner
         for row in range(1,grid.shape[1]-1):
 
-            if (np.random.rand() < INIT_PERCENTAGE_TOADS):
+            if (np.random.rand() < self.toadFraction):
 
                 toadList.append(Toad(self,[col,row]))
 